@@ -1,4 +1,22 @@
-from src.evaluation.runner import run_evaluation
+import argparse
+import asyncio
+from src.config import config
+from src.evaluation.runner import run_evaluation, arun_evaluation
 
 if __name__ == "__main__":
-    run_evaluation()
+    parser = argparse.ArgumentParser(description="Evaluate the ConvFinQA RAG agent.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run examples concurrently on one event loop")
+    parser.add_argument("--limit", type=int, default=None, help="Examples to evaluate (default: config.evaluation_sample_limit)")
+    parser.add_argument("--output", default="eval_local.csv", help="Results CSV; the resumable log is written next to it as .jsonl")
+    parser.add_argument("--spans", default=None, help="Also export per-step traces as OpenTelemetry-style JSONL spans")
+    parser.add_argument("--replay", choices=["off", "record", "replay"], default=None,
+                        help="Record OpenAI/Cohere responses, or replay recorded ones offline (default: config.api_replay_mode)")
+    args = parser.parse_args()
+
+    if args.replay:
+        config.api_replay_mode = args.replay
+
+    if args.use_async:
+        asyncio.run(arun_evaluation(args.output, limit=args.limit, spans_path=args.spans))
+    else:
+        run_evaluation(args.output, limit=args.limit, spans_path=args.spans)
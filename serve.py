@@ -0,0 +1,16 @@
+# serve.py
+
+import argparse
+from src.config import config
+from src.service import create_app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the ConvFinQA RAG agent over HTTP with warm models.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0,
+                        help="Micro-batch retrievals arriving within this window (0 disables)")
+    args = parser.parse_args()
+
+    config.retrieval_batch_window_ms = args.batch_window_ms
+    create_app().run(host=args.host, port=args.port, threaded=True)
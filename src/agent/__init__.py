@@ -1,3 +1,3 @@
-from .pipeline import run_agent_pipeline
+from .pipeline import run_agent_pipeline, arun_agent_pipeline, arun_many
 
-__all__ = ["run_agent_pipeline"]
+__all__ = ["run_agent_pipeline", "arun_agent_pipeline", "arun_many"]
@@ -0,0 +1,162 @@
+# src/agent/answer_cache.py
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import faiss
+import numpy as np
+
+from src.config import config
+from src.agent.state import AgentState
+from src.vector_store.embedding_model import get_embedding_model
+from src.vector_store.registry import index_version
+
+TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+# Words that can differ between paraphrases without changing what is asked.
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "in", "on", "for", "to", "from", "and", "by", "at", "as",
+    "is", "was", "were", "are", "be", "been", "what", "which", "how", "did", "does", "do",
+    "much", "many", "its", "their", "s", "that", "this", "with", "between", "during",
+})
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases, collapses whitespace and drops trailing punctuation."""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?.! ")
+
+
+def content_tokens(key: str) -> frozenset:
+    """The numbers and non-stopword words of a normalized question."""
+    return frozenset(token for token in TOKEN_RE.findall(key) if token not in STOPWORDS)
+
+
+class _Entry(NamedTuple):
+    state: AgentState
+    expires_at: float
+    vector_id: int
+    tokens: frozenset
+
+
+class AnswerCache:
+    """
+    Two-tier cache of finished pipeline states.
+
+    The exact tier matches the normalized question text. The optional semantic
+    tier (`semantic=True`) embeds the question with the retrieval model and looks
+    up the nearest past question by cosine similarity; a hit needs similarity >=
+    `similarity_threshold` and the same content tokens - every number and
+    non-stopword word - in both questions, since "net income 2008 to 2009" and
+    "operating income 2009 to 2010" embed almost identically. The threshold is not
+    calibrated, so the token check is what keeps different questions apart.
+
+    Entries expire after `ttl_seconds`, the least recently used are evicted past
+    `max_entries`, and everything is dropped when the vector index on disk or the
+    config changes.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float, semantic: bool = False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.semantic = semantic
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._keys_by_vector_id: dict[int, str] = {}
+        self._next_vector_id = 0
+        self._index: faiss.IndexIDMap2 | None = None
+        self._version = None
+
+    def get(self, question: str) -> AgentState | None:
+        key = normalize_question(question)
+        with self._lock:
+            self._check_version()
+            entry = self._live_entry(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry.state.model_copy(update={"cache_hit": "exact"})
+            if not self.semantic or not self._entries:
+                return None
+
+        vector = self._embed(key)
+        tokens = content_tokens(key)
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector, min(5, self._index.ntotal))
+            for score, vector_id in zip(scores[0], ids[0]):
+                if vector_id < 0 or score < self.similarity_threshold:
+                    break
+                match_key = self._keys_by_vector_id.get(int(vector_id))
+                entry = self._live_entry(match_key) if match_key else None
+                if entry is not None and entry.tokens == tokens:
+                    self._entries.move_to_end(match_key)
+                    return entry.state.model_copy(update={"cache_hit": "semantic"})
+        return None
+
+    def put(self, question: str, state: AgentState) -> None:
+        key = normalize_question(question)
+        vector = self._embed(key) if self.semantic else None
+        with self._lock:
+            self._check_version()
+            if key in self._entries:
+                self._remove(key)
+
+            vector_id = -1
+            if vector is not None:
+                if self._index is None:
+                    self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+                vector_id = self._next_vector_id
+                self._next_vector_id += 1
+                self._index.add_with_ids(vector, np.array([vector_id], dtype=np.int64))
+                self._keys_by_vector_id[vector_id] = key
+            self._entries[key] = _Entry(
+                state=state,
+                expires_at=time.time() + self.ttl_seconds,
+                vector_id=vector_id,
+                tokens=content_tokens(key),
+            )
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _embed(self, key: str) -> np.ndarray:
+        vector = get_embedding_model().embed_queries([key])
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _live_entry(self, key: str) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at < time.time():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if entry.vector_id >= 0:
+            self._keys_by_vector_id.pop(entry.vector_id, None)
+            self._index.remove_ids(np.array([entry.vector_id], dtype=np.int64))
+
+    def _check_version(self) -> None:
+        version = (index_version(), config.model_dump_json())
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_vector_id.clear()
+        self._index = None
+
+
+answer_cache = AnswerCache(
+    max_entries=config.answer_cache_max_entries,
+    ttl_seconds=config.answer_cache_ttl_seconds,
+    similarity_threshold=config.answer_cache_similarity_threshold,
+    semantic=config.answer_cache_semantic,
+)
@@ -0,0 +1,179 @@
+# src/agent/graph.py
+
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from src.agent.state import AgentState
+from src.common.tracing import step_counters
+
+
+class Step(NamedTuple):
+    """
+    One pipeline step and the AgentState fields it reads and writes.
+    `run` is the blocking implementation and `arun` the async one.
+    `config_fields` are the config settings its outputs depend on (for StageCache keys).
+    """
+    name: str
+    run: Callable[[AgentState], AgentState]
+    arun: Callable[[AgentState], Awaitable[AgentState]]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    config_fields: Tuple[str, ...] = ()
+
+
+class StepGraph:
+    """
+    Dependency graph of pipeline steps, derived from their declared inputs/outputs.
+
+    Running the graph for a set of target fields executes only the steps those
+    targets transitively need, starts every step as soon as its inputs exist, and
+    merges each step's declared outputs back into the shared state. Per-step
+    timings (wall, CPU, tokens, cache hits, retries) and the critical path are
+    recorded on the returned state.
+
+    `accumulate` names dict fields that any step may add keys to (e.g. per-step
+    token usage); they are merged from every step instead of having one producer.
+    """
+    def __init__(self, steps: List[Step], accumulate: Tuple[str, ...] = ()):
+        self.steps: Dict[str, Step] = {step.name: step for step in steps}
+        self.accumulate = accumulate
+        self.producers: Dict[str, str] = {}
+        for step in steps:
+            for field in step.outputs:
+                if field in self.producers:
+                    raise ValueError(f"'{field}' is produced by both {self.producers[field]} and {step.name}.")
+                self.producers[field] = step.name
+        self.dependencies: Dict[str, Set[str]] = {
+            step.name: {self.producers[field] for field in step.inputs if field in self.producers}
+            for step in steps
+        }
+
+    def plan(self, targets: Iterable[str]) -> Set[str]:
+        """Names of the steps needed to produce `targets`."""
+        needed: Set[str] = set()
+        stack = [self.producers[field] for field in targets if field in self.producers]
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.dependencies[name])
+        return needed
+
+    def run(self, state: AgentState, targets: Iterable[str], cache=None) -> AgentState:
+        """Runs the steps `targets` need; with a StageCache, steps whose key was seen are not rerun."""
+        plan = self.plan(targets)
+        waiting = {name: set(self.dependencies[name]) for name in plan}
+        timings: Dict[str, Dict[str, float]] = {}
+        started_at, origin = time.time(), time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max(1, len(plan))) as executor:
+            running = {}
+
+            def launch_ready():
+                for name in [n for n, deps in waiting.items() if not deps - timings.keys()]:
+                    del waiting[name]
+                    step = self.steps[name]
+                    fn = cache.wrap(step, step.run) if cache is not None else step.run
+                    running[executor.submit(_timed, fn, state, origin)] = name
+
+            launch_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    result, timings[name] = future.result()
+                    state = self._merge(state, name, result)
+                launch_ready()
+
+        return self._with_timings(state, timings, started_at)
+
+    async def arun(self, state: AgentState, targets: Iterable[str], cache=None) -> AgentState:
+        plan = self.plan(targets)
+        waiting = {name: set(self.dependencies[name]) for name in plan}
+        timings: Dict[str, Dict[str, float]] = {}
+        started_at, origin = time.time(), time.perf_counter()
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch_ready():
+            for name in [n for n, deps in waiting.items() if not deps - timings.keys()]:
+                del waiting[name]
+                step = self.steps[name]
+                fn = cache.awrap(step, step.arun) if cache is not None else step.arun
+                running[asyncio.create_task(_atimed(fn, state, origin))] = name
+
+        launch_ready()
+        while running:
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                name = running.pop(task)
+                result, timings[name] = task.result()
+                state = self._merge(state, name, result)
+            launch_ready()
+
+        return self._with_timings(state, timings, started_at)
+
+    def _merge(self, state: AgentState, name: str, result: AgentState) -> AgentState:
+        update = {field: getattr(result, field) for field in self.steps[name].outputs}
+        for field in self.accumulate:
+            update[field] = {**getattr(state, field), **getattr(result, field)}
+        return state.model_copy(update=update)
+
+    def _with_timings(self, state: AgentState, timings: Dict[str, Dict[str, float]], started_at: float) -> AgentState:
+        for name, usage in state.token_usage.items():
+            if name in timings:
+                timings[name].update(usage)
+        return state.model_copy(update={
+            "started_at": started_at,
+            "step_timings": timings,
+            "critical_path": self.critical_path(timings),
+        })
+
+    def critical_path(self, timings: Dict[str, Dict[str, float]]) -> List[str]:
+        """Walks back from the last step to finish through whichever dependency finished last."""
+        if not timings:
+            return []
+        path = [max(timings, key=lambda name: timings[name]["end"])]
+        while True:
+            deps = [dep for dep in self.dependencies[path[-1]] if dep in timings]
+            if not deps:
+                return path[::-1]
+            path.append(max(deps, key=lambda name: timings[name]["end"]))
+
+    def estimated_latency(self, timings: Dict[str, Dict[str, float]]) -> float:
+        """
+        End-to-end latency had no step been served from a StageCache: the longest
+        dependency chain, using each cached step's originally measured duration.
+        """
+        finish: Dict[str, float] = {}
+        for name in self._topological(timings):
+            timing = timings[name]
+            duration = timing["cached_duration"] if timing.get("stage_cached") else timing["duration"]
+            finish[name] = duration + max((finish[dep] for dep in self.dependencies[name] if dep in finish), default=0.0)
+        return max(finish.values(), default=0.0)
+
+    def _topological(self, names: Iterable[str]) -> List[str]:
+        order: List[str] = []
+        names = set(names)
+        while len(order) < len(names):
+            order += [n for n in names if n not in order and all(d in order or d not in names for d in self.dependencies[n])]
+        return order
+
+
+def _timed(fn: Callable[[AgentState], AgentState], state: AgentState, origin: float):
+    with step_counters() as counters:
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        result = fn(state)
+        end = time.perf_counter()
+        counters["cpu"] += time.thread_time() - cpu_start
+    return result, {"start": start - origin, "end": end - origin, "duration": end - start, **counters}
+
+
+async def _atimed(fn: Callable[[AgentState], Awaitable[AgentState]], state: AgentState, origin: float):
+    # Other tasks share the event loop thread, so only CPU spent in tracing.to_thread is counted.
+    with step_counters() as counters:
+        start = time.perf_counter()
+        result = await fn(state)
+        end = time.perf_counter()
+    return result, {"start": start - origin, "end": end - origin, "duration": end - start, **counters}
@@ -1,28 +1,122 @@
 # src/agent/pipeline.py
 
+import asyncio
+from typing import List
 from langchain_core.messages import HumanMessage
 from src.agent.state import AgentState
 from src.config import config
+from src.agent.answer_cache import answer_cache
+from src.agent.graph import Step, StepGraph
+from src.agent.stage_cache import StageCache
 from src.agent.steps import (
     extract_question,
     generate_queries,
+    retrieve_question_documents,
     retrieve_documents,
     rerank_documents,
     filter_context,
     generate_answer,
     extract_final_answer,
+    agenerate_queries,
+    aretrieve_question_documents,
+    aretrieve_documents,
+    arerank_documents,
+    afilter_context,
+    agenerate_answer,
+    aextract_final_answer,
 )
 
-def run_agent_pipeline(question: str) -> AgentState:
-    """Full RAG-based agent pipeline."""
+
+async def _aextract_question(state: AgentState) -> AgentState:
+    return extract_question(state)
+
+
+# Config settings each step's outputs depend on; StageCache keys include them.
+RETRIEVAL_FIELDS = (
+    "faiss_index_path", "metadata_path", "bm25_index_path", "facet_index_path", "embedding_model_name",
+    "top_k_retrieval", "use_hybrid_retrieval", "bm25_k1", "bm25_b", "rrf_k", "ivf_nprobe", "hnsw_ef_search",
+)
+RERANK_FIELDS = (
+    "use_ground_truth_retrieval", "reranker_model_name", "reranker_backend", "reranker_quantize",
+    "reranker_onnx_file_name", "top_k_rerank", "prompt_token_budgets", "answer_mode",
+)
+GENERATION_FIELDS = ("disable_llm_generation", "answer_mode")
+
+AGENT_GRAPH = StepGraph([
+    Step("extract_question", extract_question, _aextract_question,
+         inputs=("messages",), outputs=("question",)),
+    Step("retrieve_question", lambda s: retrieve_question_documents(s, config),
+         lambda s: aretrieve_question_documents(s, config),
+         inputs=("question",), outputs=("question_documents",), config_fields=RETRIEVAL_FIELDS),
+    Step("generate_queries", lambda s: generate_queries(s, config), lambda s: agenerate_queries(s, config),
+         inputs=("question",), outputs=("queries",)),
+    Step("retrieve_documents", lambda s: retrieve_documents(s, config), lambda s: aretrieve_documents(s, config),
+         inputs=("question", "queries", "question_documents"), outputs=("documents",),
+         config_fields=(*RETRIEVAL_FIELDS, "context_table_rows")),
+    Step("rerank_documents", lambda s: rerank_documents(s, config), lambda s: arerank_documents(s, config),
+         inputs=("question", "documents"),
+         outputs=("reranked_documents", "context_table", "context_narrative"), config_fields=RERANK_FIELDS),
+    Step("filter_context", lambda s: filter_context(s, config), lambda s: afilter_context(s, config),
+         inputs=("question", "reranked_documents"), outputs=("context", "sources"),
+         config_fields=("prompt_token_budgets",)),
+    Step("generate_answer", lambda s: generate_answer(s, config), lambda s: agenerate_answer(s, config),
+         inputs=("question", "context_table", "context_narrative"), outputs=("prompt", "generation"),
+         config_fields=GENERATION_FIELDS),
+    Step("extract_final_answer", extract_final_answer, aextract_final_answer,
+         inputs=("question", "generation", "context_table", "reranked_documents"), outputs=("answer", "program"),
+         config_fields=(*GENERATION_FIELDS, "table_store_path")),
+], accumulate=("token_usage",))
+
+
+def pipeline_targets() -> List[str]:
+    """AgentState fields callers consume; steps that feed none of them are skipped."""
+    targets = ["documents", "reranked_documents", "prompt", "generation", "answer"]
+    if config.run_filter_context:
+        targets += ["context", "sources"]
+    return targets
+
+
+def run_agent_pipeline(question: str, use_cache: bool = None, stage_cache: StageCache = None) -> AgentState:
+    """
+    Full RAG-based agent pipeline, served from the answer cache when possible.
+    `stage_cache` reuses individual step outputs (see src/evaluation/sweep.py).
+    """
+    use_cache = config.use_answer_cache if use_cache is None else use_cache
+    if use_cache:
+        cached = answer_cache.get(question)
+        if cached is not None:
+            return cached.model_copy(update={"messages": [HumanMessage(content=question)]})
+
     state = AgentState(messages=[HumanMessage(content=question)])
+    state = AGENT_GRAPH.run(state, pipeline_targets(), stage_cache)
+
+    if use_cache:
+        answer_cache.put(question, state)
+    return state
+
+
+async def arun_agent_pipeline(question: str, use_cache: bool = None, stage_cache: StageCache = None) -> AgentState:
+    """Async version of run_agent_pipeline; LLM and rerank calls don't block the event loop."""
+    use_cache = config.use_answer_cache if use_cache is None else use_cache
+    if use_cache:
+        cached = await asyncio.to_thread(answer_cache.get, question)
+        if cached is not None:
+            return cached.model_copy(update={"messages": [HumanMessage(content=question)]})
 
-    state = extract_question(state)
-    state = generate_queries(state, config)
-    state = retrieve_documents(state, config)
-    state = rerank_documents(state, config)
-    state = filter_context(state, config)
-    state = generate_answer(state, config)
-    state = extract_final_answer(state)
+    state = AgentState(messages=[HumanMessage(content=question)])
+    state = await AGENT_GRAPH.arun(state, pipeline_targets(), stage_cache)
 
+    if use_cache:
+        await asyncio.to_thread(answer_cache.put, question, state)
     return state
+
+
+async def arun_many(questions: List[str], concurrency: int = None, use_cache: bool = None) -> List[AgentState]:
+    """Runs many questions on one event loop with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency or config.async_concurrency)
+
+    async def run_one(question: str) -> AgentState:
+        async with semaphore:
+            return await arun_agent_pipeline(question, use_cache=use_cache)
+
+    return await asyncio.gather(*(run_one(q) for q in questions))
@@ -0,0 +1,131 @@
+# src/agent/program.py
+
+import re
+from typing import Callable, Dict, List, NamedTuple
+
+from src.common.numbers import parse_financial_number
+from src.common.tables import ParsedTable, find_cell, find_row_values
+
+
+class ProgramError(ValueError):
+    """The program cannot be parsed or evaluated against the context tables."""
+
+
+class CellLookup:
+    """Resolves "row label | column" references against the context tables, best ranked first."""
+    def __init__(self, tables: List[ParsedTable]):
+        self.tables = tables
+
+    def row(self, label: str) -> List[float]:
+        values = find_row_values(self.tables, label)
+        if values is None:
+            raise ProgramError(f"No row '{label}' in the context tables.")
+        return values.tolist()
+
+    def cell(self, label: str, column: str) -> float:
+        value = find_cell(self.tables, label, column)
+        if value is None:
+            raise ProgramError(f"No numeric cell for row '{label}', column '{column}'.")
+        return value
+
+
+OPERATIONS: Dict[str, Callable[[float, float], float]] = {
+    "add": lambda a, b: a + b,
+    "subtract": lambda a, b: a - b,
+    "multiply": lambda a, b: a * b,
+    "divide": lambda a, b: a / b,
+    "exp": lambda a, b: a ** b,
+    "greater": lambda a, b: float(a > b),
+}
+TABLE_OPERATIONS: Dict[str, Callable[[List[float]], float]] = {
+    "table_sum": sum,
+    "table_average": lambda values: sum(values) / len(values),
+    "table_max": max,
+    "table_min": min,
+}
+STEP_RE = re.compile(r"\s*(\w+)\s*\(((?:[^()\[\]]|\[[^\]]*\])*)\)\s*(?:,|$)")
+ARG_RE = re.compile(r"\[[^\]]*\]|[^,]+")
+
+
+class ProgramResult(NamedTuple):
+    value: float
+    is_percent: bool
+    is_boolean: bool
+
+
+def evaluate_program(program: str, tables: List[ParsedTable]) -> ProgramResult:
+    """
+    Evaluates a ConvFinQA-style program such as
+        subtract([revenue | 2008], [revenue | 2007]), divide(#0, [revenue | 2007]), multiply(#1, const_100)
+    Arguments are numbers, const_N, #n (result of step n) or [row label | column]
+    cell references; table_* operations take a row label. A final multiply by
+    const_100 marks the result as a percentage.
+    """
+    steps = list(STEP_RE.finditer(program.strip()))
+    if not steps or STEP_RE.sub("", program).strip():
+        raise ProgramError(f"Cannot parse program: {program!r}")
+
+    lookup = CellLookup(tables)
+    results: List[float] = []
+    for step in steps:
+        op, args = step.group(1).lower(), [a.strip() for a in ARG_RE.findall(step.group(2)) if a.strip()]
+        if op in TABLE_OPERATIONS:
+            values = lookup.row(args[0].strip("[]").split("|")[0]) if args else []
+            if not values:
+                raise ProgramError(f"{op} has no numeric row to work on.")
+            results.append(TABLE_OPERATIONS[op](values))
+        elif op in OPERATIONS:
+            if len(args) != 2:
+                raise ProgramError(f"{op} takes two arguments, got {len(args)}.")
+            a, b = (_argument(arg, results, lookup) for arg in args)
+            try:
+                results.append(OPERATIONS[op](a, b))
+            except ZeroDivisionError:
+                raise ProgramError("Division by zero.") from None
+        else:
+            raise ProgramError(f"Unknown operation '{op}'.")
+
+    last_op = steps[-1].group(1).lower()
+    last_args = [a.strip() for a in ARG_RE.findall(steps[-1].group(2))]
+    return ProgramResult(
+        value=results[-1],
+        is_percent=last_op == "multiply" and "const_100" in last_args,
+        is_boolean=last_op == "greater",
+    )
+
+
+def _argument(arg: str, results: List[float], lookup: CellLookup) -> float:
+    if arg.startswith("#"):
+        try:
+            return results[int(arg[1:])]
+        except (ValueError, IndexError):
+            raise ProgramError(f"Bad step reference '{arg}'.") from None
+    if arg.startswith("const_"):
+        return _constant(arg)
+    if arg.startswith("["):
+        label, _, column = arg.strip("[]").rpartition("|")
+        if not label:
+            raise ProgramError(f"Cell reference needs 'row | column': {arg}")
+        return lookup.cell(label, column)
+    value = parse_financial_number(arg)
+    if value is None:
+        raise ProgramError(f"Bad argument '{arg}'.")
+    return value
+
+
+def _constant(arg: str) -> float:
+    name = arg[len("const_"):]
+    if name == "m1":
+        return -1.0
+    try:
+        return float(name)
+    except ValueError:
+        raise ProgramError(f"Bad constant '{arg}'.") from None
+
+
+def format_result(result: ProgramResult) -> str:
+    if result.is_boolean:
+        return "yes" if result.value else "no"
+    if result.is_percent:
+        return f"{result.value:.1f}%"
+    return f"{result.value:.5f}".rstrip("0").rstrip(".")
@@ -0,0 +1,93 @@
+# src/agent/stage_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+from src.agent.state import AgentState
+from src.common import tracing
+from src.config import config
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class StageCache:
+    """
+    In-memory cache of step outputs for configuration sweeps.
+
+    A step's key is its name, the AgentState fields it reads and the config fields
+    it declares (Step.config_fields), plus `shared_fields` - swept fields no step
+    declares, which are conservatively assumed to affect every step. Two configs
+    that agree on all of them reuse the same outputs; only differing steps run.
+    """
+    def __init__(self, shared_fields: Iterable[str] = ()):
+        self.shared_fields = tuple(shared_fields)
+        self._entries: Dict[str, Tuple[Dict[str, Any], Dict[str, int], float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, step, state: AgentState) -> str:
+        fields = sorted({*step.config_fields, *self.shared_fields})
+        payload = json.dumps({
+            "step": step.name,
+            "inputs": {field: getattr(state, field) for field in step.inputs},
+            "config": {field: getattr(config, field) for field in fields},
+        }, sort_keys=True, default=_jsonable)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def wrap(self, step, run: Callable[[AgentState], AgentState]) -> Callable[[AgentState], AgentState]:
+        """`run` served from the cache when the step's key was seen before."""
+        def cached(state: AgentState) -> AgentState:
+            key = self.key(step, state)
+            entry = self._lookup(key)
+            if entry is not None:
+                return self._replay(step, state, entry)
+            start = time.perf_counter()
+            result = run(state)
+            self._store(step, key, result, time.perf_counter() - start)
+            return result
+        return cached
+
+    def awrap(self, step, arun: Callable[[AgentState], Awaitable[AgentState]]) -> Callable[[AgentState], Awaitable[AgentState]]:
+        async def cached(state: AgentState) -> AgentState:
+            key = self.key(step, state)
+            entry = self._lookup(key)
+            if entry is not None:
+                return self._replay(step, state, entry)
+            start = time.perf_counter()
+            result = await arun(state)
+            self._store(step, key, result, time.perf_counter() - start)
+            return result
+        return cached
+
+    def _lookup(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def _store(self, step, key: str, result: AgentState, duration: float) -> None:
+        outputs = {field: getattr(result, field) for field in step.outputs}
+        usage = result.token_usage.get(step.name, {})
+        with self._lock:
+            self._entries[key] = (outputs, usage, duration)
+
+    def _replay(self, step, state: AgentState, entry) -> AgentState:
+        outputs, usage, duration = entry
+        # Recorded on the step's timing, so sweeps can estimate an uncached latency.
+        tracing.count("stage_cached")
+        tracing.count("cached_duration", duration)
+        token_usage = {**state.token_usage, step.name: usage} if usage else state.token_usage
+        return state.model_copy(update={**outputs, "token_usage": token_usage})
@@ -1,6 +1,6 @@
 # src/agent/state.py
 
-from typing import List
+from typing import Dict, List
 from pydantic import BaseModel
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, AIMessage
@@ -10,6 +10,7 @@ class AgentState(BaseModel):
     messages: List[HumanMessage | AIMessage] = []
     question: str = ""
     queries: List[str] = []
+    question_documents: List[Document] = []
     documents: List[Document] = []
     reranked_documents: List[Document] = []
     context: str = ""
@@ -18,4 +19,12 @@ class AgentState(BaseModel):
     sources: List[str] = []
     prompt: str = ""
     generation: str = ""
+    program: str = ""
     answer: str = ""
+    cache_hit: str = ""
+    started_at: float = 0.0  # epoch seconds when the step graph started
+    # step -> start/end/duration (s, relative to started_at), cpu (s), cache_hits,
+    # retries, and tokens_in/tokens_out for LLM steps
+    step_timings: Dict[str, Dict[str, float]] = {}
+    token_usage: Dict[str, Dict[str, int]] = {}  # step -> {"tokens_in", "tokens_out"}
+    critical_path: List[str] = []
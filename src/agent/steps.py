@@ -2,8 +2,7 @@
 
 import re
 import os
-from typing import List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
 
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.documents import Document
@@ -12,13 +11,18 @@ from src.config import config
 from src.llm.openai_llm import llm
 from src.llm.prompts import (
     generate_queries_prompt_template,
-    reason_and_answer_prompt_template,
     extract_anwer_prompt_template,
-    filter_context_prompt_template,
 )
-from src.vector_store.retriever import VectorRetriever
-from src.vector_store.embedding_model import embedding_model
-from src.common.utils import format_prompt
+from src.llm.prompt_builder import ANSWER_TEMPLATES, build_filter_prompt, pack_answer_context
+from src.agent.program import ProgramError, evaluate_program, format_result
+from src.common.tables import ParsedTable, parse_markdown_tables
+from src.llm.tokens import count_tokens
+from src.llm.scheduler import get_scheduler
+from src.vector_store.registry import get_retriever
+from src.vector_store.micro_batcher import get_batcher
+from src.reranker import get_reranker
+from src.common import tracing
+from src.common.utils import extract_years_from_text, format_prompt
 from src.agent.state import AgentState
 
 
@@ -27,70 +31,127 @@ def extract_question(state: AgentState) -> AgentState:
 
 
 def generate_queries(state: AgentState, _) -> AgentState:
-    prompt = generate_queries_prompt_template.format(question=state.question)
-    response = llm.invoke([HumanMessage(content=format_prompt(prompt))])
-    queries = [q.strip() for q in response.content.split("\n") if q.strip()]
+    prompt = format_prompt(generate_queries_prompt_template.format(question=state.question))
+    response = _invoke(prompt)
+    return state.model_copy(update={
+        "queries": _parse_queries(state, response.content),
+        "token_usage": _usage(state, "generate_queries", prompt, response),
+    })
+
+
+async def agenerate_queries(state: AgentState, _) -> AgentState:
+    prompt = format_prompt(generate_queries_prompt_template.format(question=state.question))
+    response = await _ainvoke(prompt)
+    return state.model_copy(update={
+        "queries": _parse_queries(state, response.content),
+        "token_usage": _usage(state, "generate_queries", prompt, response),
+    })
+
+
+def _invoke(prompt: str) -> AIMessage:
+    """One LLM call through the shared OpenAI scheduler (rate limits, retries, adaptive concurrency)."""
+    return get_scheduler("openai").call(
+        lambda: llm.invoke([HumanMessage(content=prompt)]), _expected_tokens(prompt), _used_tokens
+    )
+
+
+async def _ainvoke(prompt: str) -> AIMessage:
+    return await get_scheduler("openai").acall(
+        lambda: llm.ainvoke([HumanMessage(content=prompt)]), _expected_tokens(prompt), _used_tokens
+    )
+
+
+def _expected_tokens(prompt: str) -> int:
+    return count_tokens(prompt) + config.openai_expected_output_tokens
+
+
+def _used_tokens(response: AIMessage) -> int | None:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+def _usage(state: AgentState, step: str, prompt: str, response: AIMessage) -> Dict[str, Dict[str, int]]:
+    """state.token_usage plus one LLM call; the provider's counts win over tiktoken's."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {**state.token_usage, step: {
+        "tokens_in": usage.get("input_tokens") or count_tokens(prompt),
+        "tokens_out": usage.get("output_tokens") or count_tokens(response.content),
+    }}
+
+
+def _parse_queries(state: AgentState, text: str) -> List[str]:
+    queries = [q.strip() for q in text.split("\n") if q.strip()]
     if state.question not in queries:
         queries.append(state.question)
-    return state.model_copy(update={"queries": queries})
+    return queries
 
 
 def extract_years(text: str) -> List[str]:
-    return re.findall(r"\\b(19\\d{2}|20\\d{2})\\b", text)
+    return extract_years_from_text(text)
 
 
-def retrieve_documents(state: AgentState, _) -> AgentState:
-    all_docs = []
-    seen_ids = set()
-    years = extract_years(state.question)
-    retriever = VectorRetriever()
+def retrieval_filters(question: str) -> dict[str, List[str]]:
+    """Facet filters applied to every search for `question`: the years it mentions."""
+    years = sorted(set(extract_years(question)))
+    return {"year": years} if years else {}
+
+
+def _searcher():
+    """The shared micro-batcher when retrieval batching is on, else the retriever itself."""
+    return get_batcher() or get_retriever()
+
 
-    def search(q):
-        return retriever.similarity_search(query=q, k=config.top_k_retrieval)
+def retrieve_question_documents(state: AgentState, _) -> AgentState:
+    """Retrieval for the raw question alone; needs no generated queries, so it can start first."""
+    docs = _searcher().batch_similarity_search(
+        [state.question], k=config.top_k_retrieval, filters=retrieval_filters(state.question)
+    )
+    return state.model_copy(update={"question_documents": docs})
+
+
+async def aretrieve_question_documents(state: AgentState, cfg) -> AgentState:
+    return await tracing.to_thread(retrieve_question_documents, state, cfg)
 
 
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(search, q) for q in state.queries]
-        for future in as_completed(futures):
-            for doc in future.result():
-                doc_id = doc.metadata.get("id", "")
-                if doc_id not in seen_ids:
-                    seen_ids.add(doc_id)
-                    all_docs.append(doc)
+def retrieve_documents(state: AgentState, _) -> AgentState:
+    retriever = get_retriever()
+    covered = {state.question} if state.question_documents else set()
+    queries = [q for q in state.queries if q not in covered]
+    docs = _searcher().batch_similarity_search(
+        queries, k=config.top_k_retrieval, filters=retrieval_filters(state.question)
+    )
+    # One document per filing: its hit rows merged into one table, narrative once.
+    return state.model_copy(update={"documents": retriever.group_by_document(state.question_documents + docs)})
 
-    if years:
-        filtered = [d for d in all_docs if any(y in d.metadata["id"] for y in years)]
-        if filtered:
-            all_docs = filtered
 
-    return state.model_copy(update={"documents": all_docs})
+async def aretrieve_documents(state: AgentState, cfg) -> AgentState:
+    # Embedding and FAISS search are CPU-bound; keep them off the event loop.
+    return await tracing.to_thread(retrieve_documents, state, cfg)
 
 
 def rerank_documents(state: AgentState, _) -> AgentState:
-    from  src.llm.cohere_client import cohere_client  # Local import to avoid circular
+    if config.use_ground_truth_retrieval:
+        return _with_reranked(state, state.documents)
+
+    order = get_reranker().rerank(state.question, _rerank_candidates(state), config.top_k_rerank)
+    return _with_reranked(state, [state.documents[i] for i in order])
+
 
+async def arerank_documents(state: AgentState, _) -> AgentState:
     if config.use_ground_truth_retrieval:
-        table, narrative = split_context(state.documents)
-        return state.model_copy(update={
-            "reranked_documents": state.documents,
-            "context_table": table,
-            "context_narrative": narrative,
-        })
-
-    candidates = [
-        {"text": doc.page_content, "id": doc.metadata["id"]} for doc in state.documents
-    ]
-
-    response = cohere_client.rerank(
-        model=config.reranker_model_name,
-        query=state.question,
-        documents=candidates,
-        top_n=config.top_k_rerank,
-    )
+        return _with_reranked(state, state.documents)
+
+    order = await get_reranker().arerank(state.question, _rerank_candidates(state), config.top_k_rerank)
+    return _with_reranked(state, [state.documents[i] for i in order])
 
-    reranked = [state.documents[r.index] for r in response.results]
-    table, narrative = split_context(reranked)
 
+def _rerank_candidates(state: AgentState) -> List[str]:
+    return [doc.page_content for doc in state.documents]
+
+
+def _with_reranked(state: AgentState, reranked: List[Document]) -> AgentState:
+    # Highest-ranked rows and sentences, packed into the answer prompt's token budget.
+    table, narrative = pack_answer_context(state.question, reranked, _answer_template_name())
     return state.model_copy(update={
         "reranked_documents": reranked,
         "context_table": table,
@@ -98,60 +159,136 @@ def rerank_documents(state: AgentState, _) -> AgentState:
     })
 
 
-def split_context(docs: List[Document]) -> tuple[str, str]:
-    tables, narratives = [], []
-    for doc in docs:
-        content = doc.page_content.split("passage:", 1)[-1].strip()
-        if "\n\n" in content:
-            table, narrative = content.split("\n\n", 1)
-        else:
-            table, narrative = content, ""
-        tables.append(table.strip())
-        narratives.append(narrative.strip())
-    return "\n\n".join(tables), "\n\n".join(narratives)
+def generate_answer(state: AgentState, _) -> AgentState:
+    prompt = _answer_prompt(state)
+
+    if config.disable_llm_generation:
+        return state.model_copy(update={"prompt": prompt, "generation": "[GENERATION DISABLED]"})
+
+    result = _invoke(format_prompt(prompt))
+    return state.model_copy(update={
+        "prompt": prompt,
+        "generation": result.content,
+        "token_usage": _usage(state, "generate_answer", format_prompt(prompt), result),
+    })
+
+
+async def agenerate_answer(state: AgentState, _) -> AgentState:
+    prompt = _answer_prompt(state)
 
+    if config.disable_llm_generation:
+        return state.model_copy(update={"prompt": prompt, "generation": "[GENERATION DISABLED]"})
 
-def generate_answer(state: AgentState, _) -> AgentState:
-    prompt = reason_and_answer_prompt_template.format(
+    result = await _ainvoke(format_prompt(prompt))
+    return state.model_copy(update={
+        "prompt": prompt,
+        "generation": result.content,
+        "token_usage": _usage(state, "generate_answer", format_prompt(prompt), result),
+    })
+
+
+def _answer_template_name() -> str:
+    return "program_of_thought" if config.answer_mode == "program" else "reason_and_answer"
+
+
+def _answer_prompt(state: AgentState) -> str:
+    return ANSWER_TEMPLATES[_answer_template_name()].format(
         question=state.question,
         context_table=state.context_table,
         context_narrative=state.context_narrative,
     )
 
+
+def extract_final_answer(state: AgentState) -> AgentState:
     if config.disable_llm_generation:
-        result = AIMessage("[GENERATION DISABLED]")
-    else:
-        result = llm.invoke([HumanMessage(content=format_prompt(prompt))])
+        return state.model_copy(update={"answer": "[GENERATION DISABLED]"})
+    if config.answer_mode == "program":
+        return _with_program_answer(state)
+
+    answer = _tagged_answer(state)
+    if answer is not None:
+        return state.model_copy(update={"answer": answer})
 
+    prompt = format_prompt(_fallback_prompt(state))
+    fallback = _invoke(prompt)
     return state.model_copy(update={
-        "prompt": prompt,
-        "generation": result.content,
+        "answer": fallback.content.strip(),
+        "token_usage": _usage(state, "extract_final_answer", prompt, fallback),
     })
 
 
-def extract_final_answer(state: AgentState) -> AgentState:
+async def aextract_final_answer(state: AgentState) -> AgentState:
     if config.disable_llm_generation:
         return state.model_copy(update={"answer": "[GENERATION DISABLED]"})
+    if config.answer_mode == "program":
+        return _with_program_answer(state)
 
-    match = re.search(r"<ANSWER>(.*?)</ANSWER>", state.generation, re.DOTALL)
-    if match:
-        return state.model_copy(update={"answer": match.group(1).strip()})
+    answer = _tagged_answer(state)
+    if answer is not None:
+        return state.model_copy(update={"answer": answer})
+
+    prompt = format_prompt(_fallback_prompt(state))
+    fallback = await _ainvoke(prompt)
+    return state.model_copy(update={
+        "answer": fallback.content.strip(),
+        "token_usage": _usage(state, "extract_final_answer", prompt, fallback),
+    })
 
-    fallback_prompt = extract_anwer_prompt_template.format(
+
+def _tagged_answer(state: AgentState) -> str | None:
+    match = re.search(r"<ANSWER>(.*?)</ANSWER>", state.generation, re.DOTALL)
+    return match.group(1).strip() if match else None
+
+
+def _with_program_answer(state: AgentState) -> AgentState:
+    """
+    Runs the generated <PROGRAM> over the context tables. Without a program that
+    evaluates, uses the <ANSWER> tags, then "NO ANSWER"; never another LLM call.
+    """
+    match = re.search(r"<PROGRAM>(.*?)</PROGRAM>", state.generation, re.DOTALL)
+    program = match.group(1).strip() if match else ""
+    if program:
+        try:
+            result = evaluate_program(program, _context_tables(state))
+            return state.model_copy(update={"answer": format_result(result), "program": program})
+        except ProgramError as e:
+            print(f"[INFO] Program could not be evaluated: {e}")
+
+    answer = _tagged_answer(state)
+    return state.model_copy(update={"answer": answer if answer is not None else "NO ANSWER", "program": program})
+
+
+def _context_tables(state: AgentState) -> List[ParsedTable]:
+    """The reranked filings' tables from the parsed table store; parses the prompt's tables without one."""
+    store = get_retriever().tables
+    if store is not None:
+        tables = [store.get_table(doc.metadata["id"]) for doc in state.reranked_documents]
+        tables = [table for table in tables if table is not None]
+        if tables:
+            return tables
+    return parse_markdown_tables(state.context_table)
+
+
+def _fallback_prompt(state: AgentState) -> str:
+    return extract_anwer_prompt_template.format(
         question=state.question,
         generation=state.generation,
     )
-    fallback = llm.invoke([HumanMessage(content=format_prompt(fallback_prompt))])
-    return state.model_copy(update={"answer": fallback.content.strip()})
 
 
 def filter_context(state: AgentState, _) -> AgentState:
-    prompt = filter_context_prompt_template.format(
-        question=state.question,
-        documents="\n".join(doc.page_content for doc in state.reranked_documents),
-    )
-    result = llm.invoke([HumanMessage(content=format_prompt(prompt))])
+    prompt = format_prompt(build_filter_prompt(state.question, state.reranked_documents))
+    result = _invoke(prompt)
+    return _with_filtered_context(state, prompt, result)
+
 
+async def afilter_context(state: AgentState, _) -> AgentState:
+    prompt = format_prompt(build_filter_prompt(state.question, state.reranked_documents))
+    result = await _ainvoke(prompt)
+    return _with_filtered_context(state, prompt, result)
+
+
+def _with_filtered_context(state: AgentState, prompt: str, result: AIMessage) -> AgentState:
     text = result.content.replace("<OUTPUT>", "").replace("</OUTPUT>", "")
     try:
         context, sources = re.split("sources:", text, flags=re.IGNORECASE, maxsplit=1)
@@ -159,4 +296,8 @@ def filter_context(state: AgentState, _) -> AgentState:
     except ValueError:
         context, sources = text.strip(), []
 
-    return state.model_copy(update={"context": context.strip(), "sources": sources})
+    return state.model_copy(update={
+        "context": context.strip(),
+        "sources": sources,
+        "token_usage": _usage(state, "filter_context", prompt, result),
+    })
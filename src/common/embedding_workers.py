@@ -0,0 +1,64 @@
+# src/common/embedding_workers.py
+
+import multiprocessing
+import os
+from typing import List
+
+import numpy as np
+
+# A spawned worker re-imports the parent's __main__ (e.g. src.vector_store.builder,
+# which pulls in torch) before _init_worker runs, so thread-count environment
+# variables set inside the worker come too late. They are set in the parent around
+# the pool's creation instead, and torch.set_num_threads pins torch in the worker.
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+_model = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    global _model
+    _model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return _model.encode(texts, convert_to_numpy=True).astype(np.float32, copy=False)
+
+
+class EmbeddingWorkerPool:
+    """
+    Pool of CPU worker processes, each holding its own copy of a SentenceTransformer
+    with torch pinned to `threads` threads. encode() splits a batch into one
+    contiguous shard per worker and reassembles the results in input order.
+    """
+    def __init__(self, model_name: str, workers: int, threads: int = 0):
+        self.workers = workers
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        context = multiprocessing.get_context("spawn")
+        saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+        os.environ.update({var: str(self.threads) for var in THREAD_ENV_VARS})
+        try:
+            # Workers start here and inherit the environment as it is now.
+            self._pool = context.Pool(workers, initializer=_init_worker, initargs=(model_name, self.threads))
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        shard_size = -(-len(texts) // self.workers)
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+        return np.vstack(self._pool.map(_encode_shard, shards))
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
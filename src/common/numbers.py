@@ -0,0 +1,50 @@
+# src/common/numbers.py
+
+import re
+
+NUMBER_RE = re.compile(r"-?\d[\d,]*(?:\.\d+)?|-?\.\d+")
+
+
+def parse_financial_number(text: str) -> float | None:
+    """
+    Parses a table cell or literal such as "$9,244.9", "(1.2)", "(3.1)%", "-3%", "12.5 %" or
+    "$ 1,000". Parentheses mean a negative amount; "%" is kept as a plain number
+    (12.5% -> 12.5). Returns None when the text holds no number.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    negative = text.lstrip("$ ").startswith("(") and ")" in text
+    match = NUMBER_RE.search(text.replace("$", "").replace(" ", ""))
+    if match is None:
+        return None
+    value = float(match.group().replace(",", ""))
+    return -abs(value) if negative else value
+
+
+# A whole answer that is one number, e.g. "19.7%", "-$1,234.5", "$(3.2) million".
+ANSWER_NUMBER_PATTERN = (
+    r"^\s*(?P<minus>-)?\s*\$?\s*(?P<open>\()?\s*(?P<inner_minus>-)?\s*\$?\s*"
+    r"(?P<number>(?:\d[\d,]*(?:\.\d*)?|\.\d+)(?:e[-+]?\d+)?)\s*(?P<close>\))?\s*"
+    r"(?P<percent>%)?\s*(?P<scale>thousand|million|billion|trillion)?\s*$"
+)
+ANSWER_NUMBER_RE = re.compile(ANSWER_NUMBER_PATTERN, re.IGNORECASE)
+SCALE_WORDS = {"thousand": 1e3, "million": 1e6, "billion": 1e9, "trillion": 1e12}
+
+
+def parse_answer_number(text: str) -> float | None:
+    """
+    Parses an answer that is a single number: "%" divides by 100, "$" and commas are
+    dropped, parentheses or a leading "-" negate, and a trailing scale word
+    ("million") multiplies. Returns None for anything else, e.g. "about 5".
+    """
+    match = ANSWER_NUMBER_RE.match(text)
+    if match is None or bool(match["open"]) != bool(match["close"]):
+        return None
+    value = float(match["number"].replace(",", ""))
+    if match["percent"]:
+        value /= 100
+    if match["scale"]:
+        value *= SCALE_WORDS[match["scale"].lower()]
+    negative = match["minus"] or match["inner_minus"] or match["open"]
+    return -value if negative else value
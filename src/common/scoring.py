@@ -1,7 +1,13 @@
 # src/common/scoring.py
 
+import re
 from typing import List
 
+import numpy as np
+import pandas as pd
+
+from src.common.numbers import ANSWER_NUMBER_PATTERN, SCALE_WORDS, parse_answer_number
+
 
 def relative_score(a: float, b: float, power: int = 2) -> float:
     """
@@ -11,7 +17,7 @@ def relative_score(a: float, b: float, power: int = 2) -> float:
     if a == b:
         return 1.0
     try:
-        return 1 - ((abs(a - b) / max(abs(a), abs(b))) ** power)
+        return max(0.0, 1 - ((abs(a - b) / max(abs(a), abs(b))) ** power))
     except ZeroDivisionError:
         return 0.0
 
@@ -25,15 +31,11 @@ def numeric_match(predicted: str, expected: str) -> float:
     Attempts to match numbers even with format variation (%, commas, etc.).
     Returns score in [0.0, 1.0].
     """
-    def parse_number(val: str) -> float:
-        return float(val.replace('%', 'e-2').replace('$', '').replace(',', '').strip())
-
-    try:
-        parsed_pred = parse_number(predicted)
-        parsed_exp = parse_number(expected)
-        return relative_score(parsed_pred, parsed_exp)
-    except Exception:
+    parsed_pred = parse_answer_number(predicted)
+    parsed_exp = parse_answer_number(expected)
+    if parsed_pred is None or parsed_exp is None:
         return 0.0
+    return relative_score(parsed_pred, parsed_exp)
 
 
 def precision(predicted_ids: List[str], expected_id: str) -> float:
@@ -42,3 +44,67 @@ def precision(predicted_ids: List[str], expected_id: str) -> float:
 
 def recall(predicted_ids: List[str], expected_id: str) -> float:
     return float(expected_id in predicted_ids) if predicted_ids else 0.0
+
+
+# Column-at-a-time versions of the above, for scoring whole result frames.
+
+def as_text(values) -> pd.Series:
+    """A str Series from a list, NumPy array, pandas or Arrow column; missing values become ""."""
+    if hasattr(values, "to_pandas"):
+        values = values.to_pandas()
+    return pd.Series(values, dtype=object).fillna("").astype(str).reset_index(drop=True)
+
+
+def parse_answer_numbers(values) -> np.ndarray:
+    """parse_answer_number over a column; NaN where a value is not a single number."""
+    parts = as_text(values).str.extract(ANSWER_NUMBER_PATTERN, flags=re.IGNORECASE)
+    number = pd.to_numeric(parts["number"].str.replace(",", "", regex=False), errors="coerce").to_numpy(float)
+    number[parts["open"].notna().to_numpy() != parts["close"].notna().to_numpy()] = np.nan
+
+    number = np.where(parts["percent"].notna().to_numpy(), number / 100, number)
+    scale = parts["scale"].str.lower().map(SCALE_WORDS).fillna(1.0).to_numpy(float)
+    negative = (parts["minus"].notna() | parts["inner_minus"].notna() | parts["open"].notna()).to_numpy()
+    return np.where(negative, -number, number) * scale
+
+
+def relative_scores(a: np.ndarray, b: np.ndarray, power: int = 2) -> np.ndarray:
+    """relative_score elementwise; 0.0 where either side is NaN."""
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    denominator = np.maximum(np.abs(a), np.abs(b))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.clip(1 - (np.abs(a - b) / denominator) ** power, 0.0, 1.0)
+    scores = np.where(a == b, 1.0, scores)
+    return np.nan_to_num(scores, nan=0.0)
+
+
+def score_answers(predicted, expected) -> np.ndarray:
+    """compute_accuracy over two answer columns: exact match, else numeric closeness."""
+    predicted, expected = as_text(predicted), as_text(expected)
+    exact = (predicted.str.strip().str.lower() == expected.str.strip().str.lower()).to_numpy()
+    numeric = relative_scores(parse_answer_numbers(predicted), parse_answer_numbers(expected))
+    scores = np.where(exact, 1.0, numeric)
+    return np.where((predicted == "").to_numpy() & (expected != "").to_numpy(), 0.0, scores)
+
+
+def hits_at_k(retrieved_ids, expected_ids, k: int = None, sep: str = ",") -> tuple[np.ndarray, np.ndarray]:
+    """
+    Precision and recall of the first `k` (default: all) of each row's `sep`-joined
+    retrieved ids against its one expected id. Row suffixes ("::row_1") are ignored,
+    as in normalize_id.
+    """
+    retrieved, expected = as_text(retrieved_ids), as_text(expected_ids)
+    ids = retrieved.str.split(sep).explode()
+    ids = ids.str.strip().str.split("::").str[0]
+    ids = ids[ids != ""]
+    rank = ids.groupby(level=0).cumcount().to_numpy()
+    if k is not None:
+        ids = ids[rank < k]
+
+    rows = ids.index.to_numpy()
+    hit = ids.to_numpy() == expected.to_numpy()[rows]
+    n = len(retrieved)
+    counts = np.bincount(rows, minlength=n)
+    found = np.bincount(rows, weights=hit, minlength=n) > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision_k = np.where(counts > 0, found / counts, 0.0)
+    return precision_k, found.astype(float)
@@ -0,0 +1,103 @@
+# src/common/tables.py
+
+import re
+from typing import Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+from src.common.numbers import parse_financial_number
+
+UNIT_NONE, UNIT_CURRENCY, UNIT_PERCENT = 0, 1, 2
+SEPARATOR_CHARS = set("-: ")
+YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+
+def normalize_label(label: str) -> str:
+    return re.sub(r"[^a-z0-9.%]+", " ", label.lower()).strip()
+
+
+class ParsedTable(NamedTuple):
+    """
+    A financial table with its numbers parsed once.
+    `values` is (rows, columns) float64 with NaN where a cell holds no number, and
+    `units` marks currency / percent cells. Labels are normalized (normalize_label).
+    """
+    doc_id: str
+    columns: List[str]
+    years: np.ndarray  # int32 per column, -1 when the header names no year
+    row_labels: List[str]
+    values: np.ndarray
+    units: np.ndarray
+
+    def find_rows(self, label: str, exact: bool) -> Iterator[int]:
+        key = normalize_label(label)
+        for r, row_label in enumerate(self.row_labels):
+            if row_label and (row_label == key if exact else row_label != key and (key in row_label or row_label in key)):
+                yield r
+
+    def find_columns(self, column: str) -> List[int]:
+        """Exact header matches first, then headers containing `column` (e.g. "2008" in "dec 31 2008")."""
+        key = normalize_label(column)
+        exact = [c for c, col in enumerate(self.columns) if col == key]
+        return exact + [c for c, col in enumerate(self.columns) if col != key and key and key in col]
+
+
+def parse_cell(text: str) -> Tuple[float, int]:
+    value = parse_financial_number(text)
+    unit = UNIT_PERCENT if "%" in text else UNIT_CURRENCY if "$" in text else UNIT_NONE
+    return (np.nan if value is None else value), unit
+
+
+def parse_markdown_table(table_markdown: str, doc_id: str = "") -> ParsedTable:
+    """Parses a markdown table whose first line is the header and first column the row labels."""
+    lines = [line for line in table_markdown.strip().split("\n") if "|" in line]
+    cells = [[c.strip() for c in line.strip().strip("|").split("|")] for line in lines]
+    cells = [row for row in cells if not all(set(c) <= SEPARATOR_CHARS for c in row)]
+    header, body = (cells[0], cells[1:]) if cells else ([], [])
+    columns = [normalize_label(c) for c in header[1:]]
+
+    values = np.full((len(body), len(columns)), np.nan)
+    units = np.zeros((len(body), len(columns)), dtype=np.int8)
+    for r, row in enumerate(body):
+        for c, text in enumerate(row[1:len(columns) + 1]):
+            values[r, c], units[r, c] = parse_cell(text)
+
+    years = [YEAR_RE.search(col) for col in columns]
+    return ParsedTable(
+        doc_id=doc_id,
+        columns=columns,
+        years=np.array([int(m.group()) if m else -1 for m in years], dtype=np.int32),
+        row_labels=[normalize_label(row[0]) if row else "" for row in body],
+        values=values,
+        units=units,
+    )
+
+
+def parse_markdown_tables(text: str) -> List[ParsedTable]:
+    """Parses every blank-line separated markdown table in `text`."""
+    blocks = [block for block in re.split(r"\n\s*\n", text.strip()) if "|" in block]
+    return [parse_markdown_table(block) for block in blocks]
+
+
+def find_cell(tables: List[ParsedTable], row_label: str, column: str) -> float | None:
+    """
+    Value of the first cell matching (row_label, column), searching exact row-label
+    matches in every table before partial ones. None when nothing numeric matches.
+    """
+    for exact in (True, False):
+        for table in tables:
+            for r in table.find_rows(row_label, exact):
+                for c in table.find_columns(column):
+                    if not np.isnan(table.values[r, c]):
+                        return float(table.values[r, c])
+    return None
+
+
+def find_row_values(tables: List[ParsedTable], row_label: str) -> np.ndarray | None:
+    """Numeric cells of the first row matching `row_label`, or None."""
+    for exact in (True, False):
+        for table in tables:
+            for r in table.find_rows(row_label, exact):
+                row = table.values[r]
+                return row[~np.isnan(row)]
+    return None
@@ -0,0 +1,81 @@
+# src/common/tracing.py
+
+import asyncio
+import contextvars
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+# Per-step counters the StepGraph records next to each step's wall time.
+COUNTERS = ("cpu", "cache_hits", "retries")
+PERCENTILES = (50, 95, 99)
+
+_counters: contextvars.ContextVar[Dict[str, float] | None] = contextvars.ContextVar("step_counters", default=None)
+
+
+@contextmanager
+def step_counters() -> Iterator[Dict[str, float]]:
+    """Collects count() calls made while a step runs (in this thread/task or work it sends to_thread)."""
+    counters = {name: 0.0 for name in COUNTERS}
+    token = _counters.set(counters)
+    try:
+        yield counters
+    finally:
+        _counters.reset(token)
+
+
+def count(name: str, amount: float = 1) -> None:
+    """Adds to the running step's counter; a no-op outside a step."""
+    counters = _counters.get()
+    if counters is not None:
+        counters[name] = counters.get(name, 0) + amount
+
+
+async def to_thread(fn: Callable[..., T], *args) -> T:
+    """asyncio.to_thread that charges the worker thread's CPU time to the running step."""
+    def run() -> T:
+        start = time.thread_time()
+        try:
+            return fn(*args)
+        finally:
+            count("cpu", time.thread_time() - start)
+    return await asyncio.to_thread(run)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    points = np.percentile(values, PERCENTILES) if values else np.zeros(len(PERCENTILES))
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, points)}
+
+
+def otel_spans(trace_name: str, started_at: float, step_timings: Dict[str, Dict[str, float]]) -> List[dict]:
+    """
+    OpenTelemetry-style span dicts for one pipeline run: a root span named
+    `trace_name` and one child per step, timed from `started_at` (epoch seconds).
+    """
+    trace_id = hashlib.sha256(f"{trace_name}|{started_at}".encode("utf-8")).hexdigest()[:32]
+    root_id = trace_id[:16]
+    end = max((t["end"] for t in step_timings.values()), default=0.0)
+    spans = [_span(trace_id, root_id, None, trace_name, started_at, 0.0, end, {})]
+    for name, timing in step_timings.items():
+        span_id = hashlib.sha256(f"{trace_id}|{name}".encode("utf-8")).hexdigest()[:16]
+        attributes = {k: v for k, v in timing.items() if k not in ("start", "end", "duration")}
+        spans.append(_span(trace_id, span_id, root_id, name, started_at, timing["start"], timing["end"], attributes))
+    return spans
+
+
+def _span(trace_id: str, span_id: str, parent_id: str | None, name: str, origin: float,
+          start: float, end: float, attributes: Dict[str, float]) -> dict:
+    return {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "parentSpanId": parent_id,
+        "name": name,
+        "startTimeUnixNano": int((origin + start) * 1e9),
+        "endTimeUnixNano": int((origin + end) * 1e9),
+        "attributes": attributes,
+    }
@@ -1,6 +1,6 @@
 # src/common/types.py
 
-from typing import TypedDict, List
+from typing import Dict, TypedDict, List
 
 
 class EvaluationResult(TypedDict):
@@ -18,6 +18,8 @@ class EvaluationResult(TypedDict):
     reranker_recall: float
     latency: float
     prompt: str
+    started_at: float
+    step_timings: Dict[str, Dict[str, float]]  # AgentState.step_timings
 
 
 class DocumentMetadata(TypedDict):
@@ -30,6 +32,7 @@ class DocumentMetadata(TypedDict):
 class DocumentChunk(TypedDict):
     id: str
     text: str
+    faiss_id: int
 
 class RerankChunk(TypedDict):
     text: str
@@ -2,13 +2,19 @@
 
 from pydantic import BaseModel
 from pathlib import Path
+from typing import Dict, Literal
 
 
 class Config(BaseModel):
     vector_store_dir: Path = Path("src//vector_database")
     data_path: Path = Path("data/parsed_convfinqa.csv")
     faiss_index_path: Path = vector_store_dir/"faiss_index.bin"
-    metadata_path: Path = vector_store_dir/"faiss_metadata.pkl"
+    metadata_path: Path = vector_store_dir/"faiss_metadata.bin"
+    manifest_path: Path = vector_store_dir/"faiss_manifest.sqlite"
+    bm25_index_path: Path = vector_store_dir/"bm25_index.bin"
+    facet_index_path: Path = vector_store_dir/"facet_index.bin"
+    table_store_path: Path = vector_store_dir/"table_store.bin"
+    build_record_path: Path = vector_store_dir/"build.json"
 
     # Evaluation + retrieval
     evaluation_sample_limit: int = 500
@@ -16,9 +22,89 @@ class Config(BaseModel):
 
     # Embedding + reranking
     embedding_model_name: str = "intfloat/e5-base-v2"
-    reranker_model_name: str = "rerank-english-v3.0"
+    reranker_model_name: str = "rerank-english-v3.0"  # "rerank-*" → Cohere, else a local CrossEncoder
+    reranker_backend: Literal["torch", "onnx"] = "torch"
+    reranker_batch_size: int = 32
+    reranker_quantize: bool = False
+    reranker_onnx_file_name: str | None = None
     top_k_retrieval: int = 10
     top_k_rerank: int = 5
+    context_table_rows: Literal["matched", "full"] = "matched"  # rows kept per grouped filing
+
+    # Hybrid retrieval: BM25 and dense results merged by reciprocal rank fusion
+    use_hybrid_retrieval: bool = True
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    rrf_k: int = 60
+
+    # Index build streaming
+    build_csv_chunk_rows: int = 1000
+    embedding_batch_size: int = 256
+    index_train_size: int = 50_000
+    embedding_workers: int = 1  # >1 embeds in a process pool during builds
+    torch_threads_per_worker: int = 0  # 0 splits the CPU cores evenly between workers
+
+    # Embedding cache (shared by index builds and query embedding)
+    use_embedding_cache: bool = True
+    embedding_cache_path: Path = vector_store_dir/"embedding_cache.sqlite"
+    embedding_cache_max_entries: int = 500_000
+
+    # FAISS index type + approximate search knobs
+    index_type: Literal["flat", "ivf_flat", "ivf_pq", "hnsw"] = "flat"
+    ivf_nlist: int = 1024
+    ivf_nprobe: int = 16
+    pq_m: int = 16
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+
+    # Answer cache in front of the agent pipeline
+    use_answer_cache: bool = True
+    answer_cache_max_entries: int = 10_000
+    answer_cache_ttl_seconds: float = 24 * 3600
+    # Semantic tier: also serve near-duplicate questions with the same content words.
+    # Off by default - the similarity threshold has not been calibrated on this data.
+    answer_cache_semantic: bool = False
+    answer_cache_similarity_threshold: float = 0.95
+
+    # filter_context's output is not consumed by answer generation; only run it when wanted
+    run_filter_context: bool = False
+
+    # Max questions in flight in the async pipeline
+    async_concurrency: int = 64
+    evaluation_workers: int = 16  # threads in the sync evaluation runner
+
+    # Concurrent retrievals arriving within this window share one embedding batch and
+    # FAISS search (src/vector_store/micro_batcher.py); 0 searches per request
+    retrieval_batch_window_ms: float = 0
+    retrieval_batch_max_queries: int = 256
+
+    # Shared API request scheduler (src/llm/scheduler.py); a 0 rate disables that limit
+    openai_requests_per_minute: int = 500
+    openai_tokens_per_minute: int = 40_000
+    openai_max_concurrency: int = 32
+    openai_expected_output_tokens: int = 300  # reserved per call until the real usage is known
+    cohere_requests_per_minute: int = 1000
+    cohere_max_concurrency: int = 16
+    api_max_retries: int = 6
+    api_target_latency_seconds: float = 0  # >0 also halves concurrency on slower calls
+
+    # Record/replay of OpenAI + Cohere responses (src/llm/replay.py): "record" stores every
+    # response, "replay" serves them offline and fails on requests never recorded
+    api_replay_mode: Literal["off", "record", "replay"] = "off"
+    api_replay_path: Path = Path("data/api_replay.sqlite")
+    api_replay_latency: Literal["none", "recorded", "lognormal"] = "none"  # injected when replaying
+    api_replay_latency_scale: float = 1.0  # multiplies recorded latencies
+    api_replay_latency_mean_seconds: float = 1.0
+    api_replay_latency_sigma: float = 0.5
+
+    # Prompt token budgets per template name, overriding PROMPT_TOKEN_BUDGETS in src/llm/prompts.py
+    prompt_token_budgets: Dict[str, int] = {}
+
+    # "reasoning": the LLM answers in free text; "program": it writes a calculation
+    # program over the table cells that src/agent/program.py evaluates locally
+    answer_mode: Literal["reasoning", "program"] = "reasoning"
 
     # LLM generation
     disable_llm_generation: bool = False
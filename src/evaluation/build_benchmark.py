@@ -0,0 +1,74 @@
+# src/evaluation/build_benchmark.py
+
+import argparse
+import os
+import time
+import pandas as pd
+from itertools import islice
+from typing import List
+
+from src.config import config
+from src.common.embedding_workers import EmbeddingWorkerPool
+from src.vector_store.builder import IndexBuilder
+from src.vector_store.manifest import ChunkManifest
+from src.vector_store.metadata_store import MetadataStoreWriter
+from src.vector_store.embedding_model import get_embedding_model
+
+
+def sample_chunk_texts(n: int) -> List[str]:
+    """First `n` row chunks of the corpus, prefixed as the builder embeds them."""
+    manifest = ChunkManifest(config.embedding_model_name, config.index_type)
+    chunks = IndexBuilder().load_data(manifest, MetadataStoreWriter())
+    return [f"passage: {chunk['text']}" for chunk in islice(chunks, n)]
+
+
+def benchmark_workers(worker_counts: List[int], n_chunks: int = 2000) -> pd.DataFrame:
+    """
+    Embeds the same sample in-process and with each worker count, bypassing the
+    embedding cache, and reports chunks/sec in builder-sized batches.
+    """
+    texts = sample_chunk_texts(n_chunks)
+    batch_size = config.embedding_batch_size
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    report = []
+
+    model = get_embedding_model().model
+    model.encode(batches[0][:8])
+    start = time.perf_counter()
+    for batch in batches:
+        model.encode(batch, convert_to_numpy=True)
+    elapsed = time.perf_counter() - start
+    report.append({"mode": "in-process", "workers": 1, "chunks_per_s": len(texts) / elapsed})
+
+    for workers in worker_counts:
+        pool = EmbeddingWorkerPool(config.embedding_model_name, workers, config.torch_threads_per_worker)
+        try:
+            pool.encode(batches[0][:workers * 8])  # load the model in every worker
+            start = time.perf_counter()
+            for batch in batches:
+                pool.encode(batch)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+        report.append({
+            "mode": "process-pool",
+            "workers": workers,
+            "threads_per_worker": pool.threads,
+            "chunks_per_s": len(texts) / elapsed,
+        })
+
+    return pd.DataFrame(report)
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({w for w in (1, 2, 4, 8, cpus) if w <= cpus})
+
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput vs. worker count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--chunks", type=int, default=2000)
+    args = parser.parse_args()
+
+    df = benchmark_workers(args.workers, args.chunks)
+    print("\n[BUILD BENCHMARK]")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
@@ -0,0 +1,80 @@
+# src/evaluation/index_benchmark.py
+
+import time
+import faiss
+import numpy as np
+import pandas as pd
+from typing import List
+
+from src.config import config
+from src.common.utils import load_csv_data
+from src.evaluation.metrics import compute_recall
+from src.vector_store.embedding_model import get_embedding_model
+from src.vector_store.index_factory import create_index, set_search_params, train_index
+from src.vector_store.metadata_store import MetadataStore
+
+INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "hnsw"]
+
+
+def load_corpus_vectors() -> tuple[np.ndarray, np.ndarray]:
+    """Reads every stored vector and its FAISS id back out of the built flat index."""
+    index = faiss.read_index(str(config.faiss_index_path))
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if not isinstance(inner, faiss.IndexFlat):
+        raise ValueError("The benchmark needs the corpus built with index_type='flat'.")
+    ids = faiss.vector_to_array(index.id_map) if inner is not index else np.arange(index.ntotal)
+    return inner.reconstruct_n(0, inner.ntotal), ids
+
+
+def benchmark_index_types(index_types: List[str] = INDEX_TYPES, k: int = None, limit: int = None) -> pd.DataFrame:
+    """
+    Builds each index type over the current corpus and searches it with the
+    evaluation questions. Reports, per type:
+      - recall_vs_flat: share of the exact top-k chunks the index also returns
+      - doc_recall: compute_recall of the expected document, as in run_evaluation
+      - qps: single-query searches per second
+    """
+    k = k or config.top_k_retrieval
+    rows = load_csv_data(config.data_path, limit=limit or config.evaluation_sample_limit)
+    metadata = MetadataStore(config.metadata_path)
+    vectors, ids = load_corpus_vectors()
+    queries = get_embedding_model().embed_queries([row["question"] for row in rows])
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    report = []
+    for index_type in index_types:
+        cfg = config.model_copy(update={"index_type": index_type})
+        start = time.perf_counter()
+        index = create_index(vectors.shape[1], len(vectors), cfg)
+        train_index(index, vectors)
+        index.add(vectors)
+        set_search_params(index, cfg)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = np.vstack([index.search(queries[i:i + 1], k)[1] for i in range(len(queries))])
+        search_time = time.perf_counter() - start
+
+        overlap = [len(set(found[i]) & set(truth[i])) / k for i in range(len(queries))]
+        doc_recall = [
+            compute_recall([metadata[j]["id"] for j in ids[found[i][found[i] >= 0]]], row["id"])
+            for i, row in enumerate(rows)
+        ]
+        report.append({
+            "index_type": index_type,
+            "build_s": build_time,
+            "recall_vs_flat": float(np.mean(overlap)),
+            "doc_recall": float(np.mean(doc_recall)),
+            "qps": len(queries) / search_time,
+        })
+
+    return pd.DataFrame(report)
+
+
+if __name__ == "__main__":
+    df = benchmark_index_types()
+    print("\n[INDEX BENCHMARK]")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
@@ -1,6 +1,7 @@
-from src.common.scoring import exact_match, numeric_match
+import numpy as np
+from src.common.scoring import exact_match, hits_at_k, numeric_match, score_answers
 from src.common.utils import normalize_id
-from typing import List
+from typing import List, Tuple
 
 def compute_accuracy(question: str, predicted: str, expected: str) -> float:
     """
@@ -26,3 +27,16 @@ def compute_recall(predicted_ids: List[str], expected_id: str) -> float:
     """
     normalized_ids = [normalize_id(i) for i in predicted_ids]
     return float(expected_id in normalized_ids) if predicted_ids else 0.0
+
+def compute_accuracies(predicted, expected) -> np.ndarray:
+    """
+    compute_accuracy over whole answer columns (lists, NumPy, pandas or Arrow).
+    """
+    return score_answers(predicted, expected)
+
+def compute_precision_recall_at_k(retrieved_ids, expected_ids, k: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    compute_precision / compute_recall over a column of comma-joined retrieved ids
+    (as saved in EvaluationResult), counting only the first `k` when given.
+    """
+    return hits_at_k(retrieved_ids, expected_ids, k)
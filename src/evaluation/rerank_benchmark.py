@@ -0,0 +1,68 @@
+# src/evaluation/rerank_benchmark.py
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from typing import List
+
+from src.config import config
+from src.common.utils import load_csv_data, normalize_id
+from src.evaluation.metrics import compute_precision, compute_recall
+from src.reranker import get_reranker
+from src.vector_store.registry import get_retriever
+
+
+def benchmark_rerankers(model_names: List[str], limit: int = None) -> pd.DataFrame:
+    """
+    Retrieves candidates once per evaluation question (raw question only, no LLM
+    calls, grouped per filing as in the pipeline), then reranks the same candidates with each model. Reports rerank
+    precision/recall, scored as in run_evaluation, and p50/p95 latency per call.
+    """
+    rows = load_csv_data(config.data_path, limit=limit or config.evaluation_sample_limit)
+    retriever = get_retriever()
+    candidates = [
+        retriever.group_by_document(retriever.batch_similarity_search([row["question"]], k=config.top_k_retrieval))
+        for row in rows
+    ]
+
+    report = [{
+        "model": "(no rerank)",
+        "precision": np.mean([compute_precision([normalize_id(d.metadata["id"]) for d in docs], row["id"])
+                              for row, docs in zip(rows, candidates)]),
+        "recall": np.mean([compute_recall([normalize_id(d.metadata["id"]) for d in docs], row["id"])
+                           for row, docs in zip(rows, candidates)]),
+    }]
+
+    for model_name in model_names:
+        reranker = get_reranker(model_name)
+        latencies, precisions, recalls = [], [], []
+        for row, docs in zip(rows, candidates):
+            start = time.perf_counter()
+            order = reranker.rerank(row["question"], [d.page_content for d in docs], config.top_k_rerank)
+            latencies.append(time.perf_counter() - start)
+
+            ids = [normalize_id(docs[i].metadata["id"]) for i in order]
+            precisions.append(compute_precision(ids, row["id"]))
+            recalls.append(compute_recall(ids, row["id"]))
+
+        report.append({
+            "model": model_name,
+            "precision": np.mean(precisions),
+            "recall": np.mean(recalls),
+            "p50_ms": np.percentile(latencies, 50) * 1000,
+            "p95_ms": np.percentile(latencies, 95) * 1000,
+        })
+
+    return pd.DataFrame(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare reranker quality and latency.")
+    parser.add_argument("--models", nargs="+", default=[config.reranker_model_name, "cross-encoder/ms-marco-MiniLM-L-6-v2"])
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    df = benchmark_rerankers(args.models, args.limit)
+    print("\n[RERANK BENCHMARK]")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
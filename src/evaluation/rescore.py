@@ -0,0 +1,61 @@
+# src/evaluation/rescore.py
+
+import argparse
+import csv
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from src.evaluation.metrics import compute_accuracies, compute_precision_recall_at_k
+from src.evaluation.result_log import SUMMARY_METRICS, ResultLog
+
+ANSWER_COLUMNS = ("expected_answer", "predicted_answer")
+
+
+def load_results(path: Path) -> pd.DataFrame:
+    """Saved EvaluationResults from a results CSV or a JSONL result log."""
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        return pd.DataFrame(list(ResultLog(path).read()))
+    return pd.read_csv(path, dtype={column: str for column in ANSWER_COLUMNS}, keep_default_na=False)
+
+
+def rescore(df: pd.DataFrame, k: int = None) -> pd.DataFrame:
+    """
+    Recomputes accuracy and retrieval/rerank precision and recall for every row at
+    once, without rerunning the pipeline. `k` cuts both id lists to their first k.
+    """
+    df = df.copy()
+    df["accuracy"] = compute_accuracies(df["predicted_answer"], df["expected_answer"])
+    for ids, prefix in (("retrieved_doc_ids", "retrieval"), ("reranked_doc_ids", "reranker")):
+        df[f"{prefix}_precision"], df[f"{prefix}_recall"] = compute_precision_recall_at_k(df[ids], df["id"], k)
+    return df
+
+
+def summarize(paths: List[Path], k: int = None) -> pd.DataFrame:
+    """One row of metric means per results file."""
+    rows = []
+    for path in paths:
+        df = rescore(load_results(path), k)
+        rows.append({"file": str(path), "examples": len(df),
+                     **{metric: df[metric].mean() for metric in SUMMARY_METRICS},
+                     "latency": df["latency"].astype(float).mean()})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score saved evaluation results without rerunning the pipeline.")
+    parser.add_argument("paths", nargs="+", type=Path, help="Results CSVs or .jsonl result logs")
+    parser.add_argument("--k", type=int, default=None, help="Score only the first k retrieved/reranked ids")
+    parser.add_argument("--output", type=Path, default=None, help="Write the re-scored rows of a single input here")
+    args = parser.parse_args()
+
+    if args.output:
+        if len(args.paths) != 1:
+            parser.error("--output takes exactly one input file")
+        rescore(load_results(args.paths[0]), args.k).to_csv(args.output, quoting=csv.QUOTE_NONNUMERIC, index=False)
+        print(f"[INFO] Re-scored results saved to {args.output}")
+
+    print("\n[RESCORED RESULTS]")
+    print(summarize(args.paths, args.k).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
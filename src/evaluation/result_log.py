@@ -0,0 +1,166 @@
+# src/evaluation/result_log.py
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+from src.config import Config, config
+from src.common.tracing import otel_spans, percentiles
+from src.common.types import EvaluationResult
+
+SUMMARY_METRICS = {
+    "accuracy": "Average Accuracy",
+    "retrieval_precision": "Average Retrieval Precision",
+    "retrieval_recall": "Average Retrieval Recall",
+    "reranker_precision": "Average Rerank Precision",
+    "reranker_recall": "Average Rerank Recall",
+}
+
+
+# Settings that only change how fast examples run (or how many), not their results;
+# a resumed run may change them freely.
+PACING_FIELDS = {
+    "evaluation_sample_limit", "evaluation_workers", "async_concurrency",
+    "retrieval_batch_window_ms", "retrieval_batch_max_queries",
+    "openai_requests_per_minute", "openai_tokens_per_minute", "openai_max_concurrency",
+    "openai_expected_output_tokens", "cohere_requests_per_minute", "cohere_max_concurrency",
+    "api_max_retries", "api_target_latency_seconds", "api_replay_mode", "api_replay_path",
+    "api_replay_latency", "api_replay_latency_scale", "api_replay_latency_mean_seconds",
+    "api_replay_latency_sigma",
+}
+
+
+def config_fingerprint(cfg: Config = config) -> str:
+    """Hash of every config field that can change an example's result."""
+    payload = cfg.model_dump_json(exclude=PACING_FIELDS)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def example_key(example: dict) -> Tuple[str, str]:
+    """Identifies an evaluation example; one filing id can carry several questions."""
+    return example["id"], example["question"]
+
+
+class RunningSummary:
+    """
+    Metric means updated one result at a time, so no result needs to stay in memory;
+    only each step's durations are kept, for the latency percentiles.
+    """
+    def __init__(self):
+        self.count = 0
+        self.sums: Dict[str, float] = {metric: 0.0 for metric in [*SUMMARY_METRICS, "latency"]}
+        self.step_durations: Dict[str, List[float]] = {}
+        self.step_cpu: Dict[str, float] = {}
+
+    def add(self, result: EvaluationResult) -> None:
+        self.count += 1
+        for metric in self.sums:
+            self.sums[metric] += float(result[metric])
+        for step, timing in result.get("step_timings", {}).items():
+            self.step_durations.setdefault(step, []).append(timing["duration"])
+            self.step_cpu[step] = self.step_cpu.get(step, 0.0) + timing.get("cpu", 0.0)
+
+    def mean(self, metric: str) -> float:
+        return self.sums[metric] / self.count if self.count else 0.0
+
+    def print(self) -> None:
+        print("\n[RESULTS SUMMARY]")
+        print(f"Examples: {self.count}")
+        for metric, label in SUMMARY_METRICS.items():
+            print(f"{label}: {self.mean(metric):.2%}")
+        print(f"Average Latency: {self.mean('latency'):.2f}s")
+        if self.step_durations:
+            print("\n[STEP LATENCY] step: p50 / p95 / p99 wall, mean cpu")
+            for step, durations in self.step_durations.items():
+                p = percentiles(durations)
+                print(f"{step}: {p['p50']:.3f}s / {p['p95']:.3f}s / {p['p99']:.3f}s, "
+                      f"{self.step_cpu[step] / len(durations):.3f}s")
+
+
+class ResultLog:
+    """
+    Append-only JSONL file of EvaluationResults, one line per finished example.
+
+    Each line is flushed and fsynced as it is written, so a crash loses at most the
+    example in flight; a torn last line is ignored (and that example re-run) on resume.
+
+    With a `fingerprint` (see config_fingerprint) the log starts with a header line
+    recording it, and resuming a log written under a different config raises
+    ValueError instead of mixing two configs' results.
+    """
+    def __init__(self, path: Path, fingerprint: str = None):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.summary = RunningSummary()
+        self.completed: Set[Tuple[str, str]] = set()
+        for result in self.read():
+            self.completed.add(example_key(result))
+            self.summary.add(result)
+        if fingerprint is not None and not self.completed and self.path.exists():
+            self.path.unlink()  # no results to keep; restart with this config's header
+        if fingerprint is not None and self.completed and self.read_fingerprint() != fingerprint:
+            raise ValueError(
+                f"{self.path} holds results from a different config (fingerprint {self.read_fingerprint()}, "
+                f"now {fingerprint}); pass another --output or delete the log to start over."
+            )
+        self._file = None
+
+    def read(self) -> Iterator[EvaluationResult]:
+        for record in self._records():
+            if "config_fingerprint" not in record:
+                yield record
+
+    def read_fingerprint(self) -> str | None:
+        """The fingerprint in the log's header line, or None for a log without one."""
+        for record in self._records():
+            return record.get("config_fingerprint")
+        return None
+
+    def _records(self) -> Iterator[dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def append(self, result: EvaluationResult) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")  # terminate a torn line left by a crash
+            if not self._file.tell() and self.fingerprint is not None:
+                header = {"config_fingerprint": self.fingerprint, "config": json.loads(config.model_dump_json())}
+                self._file.write(json.dumps(header) + "\n")
+        self._file.write(json.dumps(result) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.completed.add(example_key(result))
+        self.summary.add(result)
+
+    def export_spans(self, path: Path) -> int:
+        """Writes every logged run's steps as OpenTelemetry-style spans, one JSON object per line."""
+        written = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for result in self.read():
+                if not result.get("step_timings"):
+                    continue
+                for span in otel_spans(f"example {result['id']}", result["started_at"], result["step_timings"]):
+                    f.write(json.dumps(span) + "\n")
+                    written += 1
+        return written
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
@@ -2,25 +2,45 @@
 
 import time
 import csv
+import json
+import asyncio
 import pandas as pd
+from pathlib import Path
 from typing import List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.config import config
-from src.agent.pipeline import run_agent_pipeline
+from src.agent.pipeline import run_agent_pipeline, arun_agent_pipeline
+from src.agent.state import AgentState
 from src.common.types import EvaluationResult
 from src.common.utils import load_csv_data, normalize_id
 from src.evaluation.metrics import compute_accuracy, compute_precision, compute_recall
+from src.evaluation.result_log import ResultLog, config_fingerprint, example_key
+from src.llm.scheduler import scheduler_metrics
 
 
 def evaluate_single_example(row: dict) -> EvaluationResult:
     question = row["question"]
-    expected = row["answer"]
-    expected_doc_id = row["id"]
-    ex_id = row["id"]
 
     start_time = time.time()
-    result = run_agent_pipeline(question)
+    # Identically worded questions about different filings are common in the
+    # dataset, so evaluation always runs the full pipeline.
+    result = run_agent_pipeline(question, use_cache=False)
+    latency = time.time() - start_time
+    return score_example(row, result, latency)
+
+
+async def aevaluate_single_example(row: dict) -> EvaluationResult:
+    start_time = time.time()
+    result = await arun_agent_pipeline(row["question"], use_cache=False)
     latency = time.time() - start_time
+    return score_example(row, result, latency)
+
+
+def score_example(row: dict, result: AgentState, latency: float) -> EvaluationResult:
+    question = row["question"]
+    expected = row["answer"]
+    expected_doc_id = row["id"]
+    ex_id = row["id"]
 
     answer = result.answer
     generation = result.generation
@@ -48,29 +68,108 @@ def evaluate_single_example(row: dict) -> EvaluationResult:
         reranker_recall=reranker_recall,
         latency=latency,
         prompt=result.prompt,
+        started_at=result.started_at,
+        step_timings=result.step_timings,
     )
 
 
-def run_evaluation(save_path: str = "eval_local.csv", limit: int = 500):
-    data = load_csv_data(config.data_path, limit=limit)
-    results: List[EvaluationResult] = []
+def run_evaluation(save_path: str = "eval_local.csv", limit: int = None, log_path: str = None,
+                   spans_path: str = None):
+    """
+    Evaluates the dataset, streaming each result to a JSONL log as it finishes.
+
+    Examples already in the log are skipped, so an interrupted run resumes where it
+    stopped. A failing example is reported and left for the next run. The CSV and
+    summary at the end cover every logged result; `spans_path` also exports their
+    per-step traces as OpenTelemetry-style JSONL spans.
+    """
+    log, pending = _open_log(save_path, limit, log_path)
+    print(f"[INFO] Evaluating {len(pending)} examples ({log.summary.count} already done)...")
+
+    try:
+        # API pressure is paced by the shared request scheduler, not by the pool size.
+        with ThreadPoolExecutor(max_workers=config.evaluation_workers) as executor:
+            futures = {executor.submit(evaluate_single_example, row): row for row in pending}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    _report_failure(futures[future], e)
+                    continue
+                _record(log, result, len(pending))
+    finally:
+        log.close()
 
-    print(f"[INFO] Evaluating {len(data)} examples...")
+    save_results(log, save_path, spans_path)
+    print_scheduler_metrics()
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(evaluate_single_example, row) for row in data]
-        for future in as_completed(futures):
-            results.append(future.result())
 
-    df = pd.DataFrame(results)
+async def arun_evaluation(save_path: str = "eval_local.csv", limit: int = None, concurrency: int = None,
+                          log_path: str = None, spans_path: str = None):
+    """Same as run_evaluation, driving every example from one event loop."""
+    log, pending = _open_log(save_path, limit, log_path)
+    semaphore = asyncio.Semaphore(concurrency or config.async_concurrency)
+
+    print(f"[INFO] Evaluating {len(pending)} examples (async, {log.summary.count} already done)...")
+
+    async def evaluate(row: dict) -> tuple[dict, EvaluationResult | Exception]:
+        async with semaphore:
+            try:
+                return row, await aevaluate_single_example(row)
+            except Exception as e:
+                return row, e
+
+    try:
+        for next_done in asyncio.as_completed([evaluate(row) for row in pending]):
+            row, result = await next_done
+            if isinstance(result, Exception):
+                _report_failure(row, result)
+                continue
+            _record(log, result, len(pending))
+    finally:
+        log.close()
+
+    save_results(log, save_path, spans_path)
+    print_scheduler_metrics()
+
+
+def _open_log(save_path: str, limit: int | None, log_path: str | None) -> tuple[ResultLog, List[dict]]:
+    """
+    Opens the result log (default: save_path with a .jsonl suffix) and lists the examples
+    still to run. A log written under a different config is refused (see ResultLog).
+    """
+    data = load_csv_data(config.data_path, limit=limit or config.evaluation_sample_limit)
+    log = ResultLog(Path(log_path) if log_path else Path(save_path).with_suffix(".jsonl"), config_fingerprint())
+    return log, [row for row in data if example_key(row) not in log.completed]
+
+
+def _record(log: ResultLog, result: EvaluationResult, total: int) -> None:
+    log.append(result)
+    done = len(log.completed)
+    if done % 10 == 0:
+        print(f"[INFO] {done} examples logged ({total} this run); "
+              f"accuracy so far {log.summary.mean('accuracy'):.2%}")
+
+
+def _report_failure(row: dict, error: Exception) -> None:
+    print(f"[INFO] Example {row['id']} failed ({type(error).__name__}: {error}); it will be retried on the next run.")
+
+
+def save_results(log: ResultLog, save_path: str, spans_path: str = None):
+    """Writes every logged result to `save_path` as CSV and prints the running summary."""
+    df = pd.DataFrame(list(log.read()))
+    if "step_timings" in df:
+        df["step_timings"] = df["step_timings"].map(json.dumps)
     df.to_csv(save_path, quoting=csv.QUOTE_NONNUMERIC, index=False)
 
-    # Summary
-    print("\n[RESULTS SUMMARY]")
-    print(f"Average Accuracy: {df['accuracy'].mean():.2%}")
-    print(f"Average Retrieval Precision: {df['retrieval_precision'].mean():.2%}")
-    print(f"Average Retrieval Recall: {df['retrieval_recall'].mean():.2%}")
-    print(f"Average Rerank Precision: {df['reranker_precision'].mean():.2%}")
-    print(f"Average Rerank Recall: {df['reranker_recall'].mean():.2%}")
-    print(f"Average Latency: {df['latency'].mean():.2f}s")
-    print(f"Results saved to {save_path}")
+    log.summary.print()
+    print(f"Results saved to {save_path} (log: {log.path})")
+    if spans_path:
+        print(f"[INFO] Wrote {log.export_spans(Path(spans_path))} spans to {spans_path}")
+
+
+def print_scheduler_metrics() -> None:
+    for provider, m in scheduler_metrics().items():
+        print(f"[INFO] {provider}: {m['requests']} requests, {m['rate_limited']} rate-limited, "
+              f"{m['retries']} retries, throttled {m['throttled_seconds']:.1f}s, "
+              f"backoff {m['backoff_seconds']:.1f}s, concurrency limit {m['concurrency_limit']}")
@@ -0,0 +1,194 @@
+# src/evaluation/sweep.py
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from pydantic import TypeAdapter
+
+from src.config import Config, config
+from src.agent.pipeline import AGENT_GRAPH, arun_agent_pipeline
+from src.agent.stage_cache import StageCache
+from src.common.tracing import percentiles
+from src.common.utils import load_csv_data
+from src.evaluation.result_log import SUMMARY_METRICS
+from src.evaluation.runner import score_example
+from src.reranker import clear_rerankers
+from src.vector_store.registry import clear_retrievers
+
+# Settings baked into a loaded retriever / reranker; changing one needs a reload.
+RETRIEVER_LOAD_FIELDS = {
+    "vector_store_dir", "faiss_index_path", "metadata_path", "manifest_path", "bm25_index_path",
+    "facet_index_path", "table_store_path", "build_record_path",
+    "embedding_model_name", "bm25_k1", "bm25_b", "ivf_nprobe", "hnsw_ef_search",
+}
+RERANKER_LOAD_FIELDS = {"reranker_backend", "reranker_batch_size", "reranker_quantize", "reranker_onnx_file_name"}
+# Files of one index build; sweeping vector_store_dir moves them all into that directory.
+VECTOR_STORE_FILES = (
+    "faiss_index_path", "metadata_path", "manifest_path", "bm25_index_path", "facet_index_path", "table_store_path",
+    "build_record_path",
+)
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    """
+    Parses "field=v1,v2" (or "field=[JSON list]") specs into Config values,
+    validated against the field's type. "a+b=[[a1, b1], [a2, b2]]" sweeps fields
+    together (zipped, not crossed with each other).
+
+    An index only works with the model it was built with, so embedding_model_name
+    must be swept together with each model's index directory:
+    embedding_model_name+vector_store_dir=[["model", "dir"], ...].
+    """
+    grid = {}
+    for spec in specs:
+        name, _, raw = spec.partition("=")
+        fields = name.split("+")
+        for field in fields:
+            if field not in Config.model_fields:
+                raise ValueError(f"Unknown config field '{field}'.")
+        values = json.loads(raw) if raw.startswith("[") else raw.split(",")
+        if len(fields) == 1:
+            grid[name] = [_validate(name, v) for v in values]
+            continue
+        if any(not isinstance(v, list) or len(v) != len(fields) for v in values):
+            raise ValueError(f"'{name}' takes a JSON list of {len(fields)}-item lists.")
+        grid[name] = [tuple(_validate(field, v) for field, v in zip(fields, value)) for value in values]
+
+    if "embedding_model_name" in grid or any(
+        "embedding_model_name" in name.split("+") and "vector_store_dir" not in name.split("+") for name in grid
+    ):
+        raise ValueError(
+            "Sweeping embedding_model_name would search each index with the wrong model; pair every model "
+            'with its index directory: embedding_model_name+vector_store_dir=[["model", "dir"], ...].'
+        )
+    return grid
+
+
+def _validate(field: str, value: Any) -> Any:
+    return TypeAdapter(Config.model_fields[field].annotation).validate_python(_from_json(value))
+
+
+def _from_json(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def grid_fields(grid: Dict[str, List[Any]]) -> List[str]:
+    return [field for name in grid for field in name.split("+")]
+
+
+def grid_points(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    points = []
+    for values in itertools.product(*grid.values()):
+        point = {}
+        for name, value in zip(grid, values):
+            point.update(zip(name.split("+"), value) if "+" in name else {name: value})
+        points.append(point)
+    return points
+
+
+def apply_config(point: Dict[str, Any]) -> None:
+    if "vector_store_dir" in point:
+        # Index files follow their directory unless the point sets them itself.
+        directory = Path(point["vector_store_dir"])
+        point = {**{f: directory / getattr(config, f).name for f in VECTOR_STORE_FILES}, **point}
+    changed = {name for name, value in point.items() if getattr(config, name) != value}
+    for name in changed:
+        setattr(config, name, point[name])
+    if changed & RETRIEVER_LOAD_FIELDS:
+        clear_retrievers()
+    if changed & RERANKER_LOAD_FIELDS:
+        clear_rerankers()
+
+
+def run_sweep(grid: Dict[str, List[Any]], limit: int = None, concurrency: int = None) -> pd.DataFrame:
+    """
+    Evaluates every combination in `grid` over the same examples, one config at a
+    time, sharing a StageCache: a step whose inputs and declared config fields match
+    an earlier config's is reused, so e.g. a top_k_rerank sweep retrieves and
+    generates queries once. Returns one row per config with quality, estimated
+    uncached latency (from the DAG's longest path) and token cost.
+    """
+    return asyncio.run(arun_sweep(grid, limit, concurrency))
+
+
+async def arun_sweep(grid: Dict[str, List[Any]], limit: int = None, concurrency: int = None) -> pd.DataFrame:
+    # One event loop for the whole sweep, so async API clients keep their connections.
+    data = load_csv_data(config.data_path, limit=limit or config.evaluation_sample_limit)
+    declared = {field for step in AGENT_GRAPH.steps.values() for field in step.config_fields}
+    fields = grid_fields(grid)
+    if "vector_store_dir" in fields:
+        fields += [f for f in VECTOR_STORE_FILES if f not in fields]
+    cache = StageCache(shared_fields=[name for name in fields if name not in declared])
+    original = {name: getattr(config, name) for name in fields}
+    rows = []
+
+    try:
+        for point in grid_points(grid):
+            apply_config(point)
+            print(f"[INFO] Sweep config {point} ({len(data)} examples)...")
+            start, hits_before = time.perf_counter(), cache.hits
+            results = await _evaluate(data, cache, concurrency or config.async_concurrency)
+            rows.append(_summarize(point, results, time.perf_counter() - start, cache.hits - hits_before))
+    finally:
+        apply_config(original)
+
+    return pd.DataFrame(rows)
+
+
+async def _evaluate(data: List[dict], cache: StageCache, concurrency: int) -> List[tuple]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def evaluate(row: dict):
+        async with semaphore:
+            try:
+                state = await arun_agent_pipeline(row["question"], use_cache=False, stage_cache=cache)
+            except Exception as e:
+                print(f"[INFO] Example {row['id']} failed ({type(e).__name__}: {e}); skipped in this config.")
+                return None
+            latency = AGENT_GRAPH.estimated_latency(state.step_timings)
+            return score_example(row, state, latency), state.token_usage
+
+    return [r for r in await asyncio.gather(*(evaluate(row) for row in data)) if r is not None]
+
+
+def _summarize(point: Dict[str, Any], results: List[tuple], wall: float, stage_hits: int) -> Dict[str, Any]:
+    scores = [score for score, _ in results]
+    latencies = [score["latency"] for score in scores]
+    tokens = [sum(u.get("tokens_in", 0) + u.get("tokens_out", 0) for u in usage.values()) for _, usage in results]
+    return {
+        **{name: str(value) for name, value in point.items()},
+        "examples": len(scores),
+        **{metric: float(np.mean([s[metric] for s in scores])) if scores else 0.0 for metric in SUMMARY_METRICS},
+        "latency_p50": percentiles(latencies)["p50"],
+        "latency_p95": percentiles(latencies)["p95"],
+        "tokens_per_example": float(np.mean(tokens)) if tokens else 0.0,
+        "stage_cache_hits": stage_hits,
+        "sweep_seconds": wall,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a grid of config settings, reusing unchanged pipeline stages.")
+    parser.add_argument("grid", nargs="+", help='Config values to sweep, e.g. top_k_rerank=3,5 top_k_retrieval=10,20')
+    parser.add_argument("--limit", type=int, default=None, help="Examples per config (default: config.evaluation_sample_limit)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Examples in flight (default: config.async_concurrency)")
+    parser.add_argument("--output", type=Path, default=Path("sweep_results.csv"))
+    args = parser.parse_args()
+
+    df = run_sweep(parse_grid(args.grid), args.limit, args.concurrency)
+    df.to_csv(args.output, index=False)
+    print("\n[SWEEP RESULTS]")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"Results saved to {args.output}")
@@ -1,19 +1,22 @@
 from .openai_llm import llm
-from .cohere_client import cohere_client
+from .cohere_client import cohere_client, async_cohere_client
 from .prompts import (
     reason_and_answer_prompt_template,
     eval_prompt_template,
     extract_anwer_prompt_template,
     filter_context_prompt_template,
     generate_queries_prompt_template,
+    program_of_thought_prompt_template,
 )
 
 __all__ = [
     "llm",
     "cohere_client",
+    "async_cohere_client",
     "reason_and_answer_prompt_template",
     "eval_prompt_template",
     "extract_anwer_prompt_template",
     "filter_context_prompt_template",
     "generate_queries_prompt_template",
+    "program_of_thought_prompt_template",
 ]
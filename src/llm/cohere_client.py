@@ -4,7 +4,12 @@ import os
 from dotenv import load_dotenv
 import cohere
 
+from src.llm.replay import AsyncReplayRerankClient, ReplayRerankClient
+
 load_dotenv()
 
 cohere_api_key = os.getenv("COHERE_API_KEY")
-cohere_client = cohere.Client(cohere_api_key)
+cohere_client = ReplayRerankClient(cohere.Client(cohere_api_key))
+
+# Shared async client: one HTTP connection pool for every in-flight rerank call.
+async_cohere_client = AsyncReplayRerankClient(cohere.AsyncClient(cohere_api_key))
@@ -4,13 +4,16 @@ import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
+from src.llm.replay import ReplayChatModel
+
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = os.getenv("OPENAI_MODEL", "gpt-4")
 
-llm = ChatOpenAI(
+llm = ReplayChatModel(ChatOpenAI(
     model=MODEL_NAME,
     temperature=0.0,
-    api_key=OPENAI_API_KEY
-)
+    api_key=OPENAI_API_KEY,
+    max_retries=0,  # retries and backoff are owned by src/llm/scheduler.py
+))
@@ -0,0 +1,112 @@
+# src/llm/prompt_builder.py
+
+import re
+from typing import List, NamedTuple
+
+from langchain_core.documents import Document
+
+from src.config import config
+from src.llm.prompts import (
+    PROMPT_TOKEN_BUDGETS,
+    reason_and_answer_prompt_template,
+    program_of_thought_prompt_template,
+    filter_context_prompt_template,
+)
+from src.llm.tokens import count_tokens
+
+# Templates that take (question, context_table, context_narrative), by budget name.
+ANSWER_TEMPLATES = {
+    "reason_and_answer": reason_and_answer_prompt_template,
+    "program_of_thought": program_of_thought_prompt_template,
+}
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# Allowance for the newline that joins each unit to the next.
+SEPARATOR_TOKENS = 1
+
+
+class PackedDocument(NamedTuple):
+    id: str
+    table: str
+    narrative: str
+
+
+def token_budget(template_name: str) -> int:
+    return config.prompt_token_budgets.get(template_name, PROMPT_TOKEN_BUDGETS[template_name])
+
+
+def _cost(text: str) -> int:
+    return count_tokens(text) + SEPARATOR_TOKENS
+
+
+def pack_documents(docs: List[Document], budget: int) -> List[PackedDocument]:
+    """
+    Fits ranked, grouped documents (see VectorRetriever.group_by_document) into
+    `budget` tokens.
+
+    Units are taken greedily in priority order, skipping any that no longer fit:
+    hit rows across documents in rank order, then the other table rows, then
+    narrative sentences. A table's header is charged with its first row. Kept
+    units go back in their original order; documents that fit whole are untouched.
+    """
+    lines = [doc.metadata["table"].split("\n") if doc.metadata["table"] else [] for doc in docs]
+    sentences = [SENTENCE_RE.split(doc.metadata["narrative"]) if doc.metadata["narrative"] else [] for doc in docs]
+
+    total = sum(_cost(unit) for units in lines + sentences for unit in units)
+    if total <= budget:
+        return [PackedDocument(doc.metadata["id"], doc.metadata["table"], doc.metadata["narrative"]) for doc in docs]
+
+    hit_units, other_units = [], []
+    for d, doc in enumerate(docs):
+        hits = set(doc.metadata["rows"])
+        for i, row in enumerate(doc.metadata["table_rows"][doc.metadata["header_rows"]:], start=doc.metadata["header_rows"]):
+            (hit_units if row in hits else other_units).append((d, i))
+
+    kept_lines = [set() for _ in docs]
+    kept_sentences = [set() for _ in docs]
+    remaining = budget
+    for d, i in hit_units + other_units:
+        header = range(docs[d].metadata["header_rows"])
+        cost = _cost(lines[d][i])
+        if not kept_lines[d]:
+            cost += sum(_cost(lines[d][h]) for h in header)
+        if cost <= remaining:
+            kept_lines[d].update([i, *header])
+            remaining -= cost
+    for d in range(len(docs)):
+        for i, sentence in enumerate(sentences[d]):
+            cost = _cost(sentence)
+            if cost <= remaining:
+                kept_sentences[d].add(i)
+                remaining -= cost
+
+    return [
+        PackedDocument(
+            doc.metadata["id"],
+            "\n".join(lines[d][i] for i in sorted(kept_lines[d])),
+            " ".join(sentences[d][i] for i in sorted(kept_sentences[d])),
+        )
+        for d, doc in enumerate(docs)
+    ]
+
+
+def pack_answer_context(question: str, docs: List[Document],
+                        template_name: str = "reason_and_answer") -> tuple[str, str]:
+    """(context_table, context_narrative) for an answer template, within its budget."""
+    overhead = count_tokens(ANSWER_TEMPLATES[template_name].format(
+        question=question, context_table="", context_narrative=""
+    ))
+    packed = pack_documents(docs, token_budget(template_name) - overhead)
+    return (
+        "\n\n".join(p.table for p in packed if p.table),
+        "\n\n".join(p.narrative for p in packed if p.narrative),
+    )
+
+
+def build_filter_prompt(question: str, docs: List[Document]) -> str:
+    """filter_context_prompt_template over the ranked documents, within its budget."""
+    overhead = count_tokens(filter_context_prompt_template.format(question=question, documents=""))
+    packed = pack_documents(docs, token_budget("filter_context") - overhead)
+    return filter_context_prompt_template.format(
+        question=question,
+        documents="\n".join(f"passage: {p.table}\n\n{p.narrative}".strip() for p in packed if p.table or p.narrative),
+    )
@@ -1,5 +1,13 @@
 from langchain.prompts import PromptTemplate
 
+# Max prompt tokens per template; the packed context fills whatever the template and
+# question leave. Override per template with config.prompt_token_budgets.
+PROMPT_TOKEN_BUDGETS = {
+    "reason_and_answer": 3000,
+    "program_of_thought": 3000,
+    "filter_context": 4000,
+}
+
 reason_and_answer_prompt_template = PromptTemplate(
     template="""
 You are a financial analysis assistant.
@@ -161,4 +169,49 @@ trailing three quarters revenue
 <QUERY>{question}</QUERY>
 """,
     input_variables=["question"],
-)
\ No newline at end of file
+)
+
+# Prompt 6: Program of Thought (answer_mode="program")
+
+program_of_thought_prompt_template = PromptTemplate(
+    template="""
+You are a financial analysis assistant.
+
+<INSTRUCTIONS>
+Do NOT calculate anything yourself. Write a PROGRAM that computes the answer to the QUESTION
+from the TABLE; it is executed locally.
+
+- A program is a comma-separated list of steps: op(arg1, arg2)
+- Operations: add, subtract, multiply, divide, exp, greater
+  and table_sum, table_average, table_max, table_min, which take a row label: table_sum(row label)
+- Arguments:
+  - [row label | column] refers to a TABLE cell, using the row label and column header as written
+  - #n is the result of step n (counting from 0)
+  - plain numbers, or constants such as const_100, const_1000, const_m1 (= -1)
+- For a percentage, end with multiply(#n, const_100).
+- If the answer is not a calculation over the TABLE, give it directly in <ANSWER> tags instead.
+- If no useful information is found, respond with <ANSWER>NO ANSWER</ANSWER>.
+</INSTRUCTIONS>
+
+<EXAMPLE>
+<QUESTION>What was the percentage increase in revenue from 2007 to 2008?</QUESTION>
+<TABLE>
+| item | 2007 | 2008 |
+| --- | --- | --- |
+| revenue | $9,244.9 | $9,362.2 |
+</TABLE>
+<OUTPUT>
+<PROGRAM>subtract([revenue | 2008], [revenue | 2007]), divide(#0, [revenue | 2007]), multiply(#1, const_100)</PROGRAM>
+</OUTPUT>
+</EXAMPLE>
+
+<QUESTION>{question}</QUESTION>
+<TABLE>
+{context_table}
+</TABLE>
+<CONTEXT>
+{context_narrative}
+</CONTEXT>
+""",
+    input_variables=["question", "context_table", "context_narrative"],
+)
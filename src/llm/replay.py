@@ -0,0 +1,183 @@
+# src/llm/replay.py
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from cohere import RerankResponse, RerankResponseResultsItem
+from langchain_core.messages import AIMessage, BaseMessage
+
+from src.config import config
+from src.common.utils import ensure_dir
+
+
+class ReplayMissError(LookupError):
+    """Replay mode was asked for a request that was never recorded."""
+
+
+class ReplayStore:
+    """SQLite map of request hash -> recorded response JSON and the latency it took live."""
+    def __init__(self, path: Path):
+        ensure_dir(Path(path).parent)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, provider TEXT NOT NULL, response TEXT NOT NULL, latency REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Tuple[Any, float] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT response, latency FROM responses WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put(self, key: str, provider: str, response: Any, latency: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, response, latency) VALUES (?, ?, ?, ?)",
+                (key, provider, json.dumps(response), latency),
+            )
+
+
+def request_key(provider: str, request: Dict[str, Any]) -> str:
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return f"{provider}|{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def replay_delay(key: str, recorded: float) -> float:
+    """Latency to inject for one replayed response; seeded by the key, so runs repeat exactly."""
+    if config.api_replay_latency == "recorded":
+        return recorded * config.api_replay_latency_scale
+    if config.api_replay_latency == "lognormal":
+        sigma = config.api_replay_latency_sigma
+        mu = math.log(config.api_replay_latency_mean_seconds) - sigma ** 2 / 2
+        return random.Random(key).lognormvariate(mu, sigma)
+    return 0.0
+
+
+class _Replayed:
+    """
+    Record/replay proxy around an API client, driven by `config.api_replay_mode`:
+    "off" calls through, "record" calls through and stores the response, "replay"
+    serves stored responses (plus injected latency) without touching the network.
+    Anything not proxied is delegated to the wrapped client.
+    """
+    provider = ""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _call(self, request: Dict[str, Any], live: Callable[[], Any], encode, decode):
+        if config.api_replay_mode == "off":
+            return live()
+        key = request_key(self.provider, request)
+        if config.api_replay_mode == "replay":
+            response, delay = self._replay(key)
+            time.sleep(delay)
+            return decode(response)
+        start = time.monotonic()
+        result = live()
+        get_replay_store().put(key, self.provider, encode(result), time.monotonic() - start)
+        return result
+
+    async def _acall(self, request: Dict[str, Any], live: Callable[[], Awaitable[Any]], encode, decode):
+        if config.api_replay_mode == "off":
+            return await live()
+        key = request_key(self.provider, request)
+        if config.api_replay_mode == "replay":
+            response, delay = self._replay(key)
+            await asyncio.sleep(delay)
+            return decode(response)
+        start = time.monotonic()
+        result = await live()
+        get_replay_store().put(key, self.provider, encode(result), time.monotonic() - start)
+        return result
+
+    def _replay(self, key: str) -> Tuple[Any, float]:
+        hit = get_replay_store().get(key)
+        if hit is None:
+            raise ReplayMissError(f"No recorded {self.provider} response for request {key}")
+        response, latency = hit
+        return response, replay_delay(key, latency)
+
+
+class ReplayChatModel(_Replayed):
+    """Wraps a LangChain chat model's invoke/ainvoke."""
+    provider = "openai"
+
+    def invoke(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        return self._call(self._request(messages, kwargs), lambda: self.client.invoke(messages, **kwargs),
+                          _encode_message, _decode_message)
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        return await self._acall(self._request(messages, kwargs), lambda: self.client.ainvoke(messages, **kwargs),
+                                 _encode_message, _decode_message)
+
+    def _request(self, messages: List[BaseMessage], kwargs: dict) -> Dict[str, Any]:
+        return {
+            "model": getattr(self.client, "model_name", None),
+            "temperature": getattr(self.client, "temperature", None),
+            "messages": [[m.type, m.content] for m in messages],
+            "kwargs": kwargs,
+        }
+
+
+class ReplayRerankClient(_Replayed):
+    """Wraps cohere.Client.rerank."""
+    provider = "cohere"
+
+    def rerank(self, **kwargs) -> RerankResponse:
+        return self._call(_rerank_request(kwargs), lambda: self.client.rerank(**kwargs),
+                          _encode_rerank, _decode_rerank)
+
+
+class AsyncReplayRerankClient(_Replayed):
+    """Wraps cohere.AsyncClient.rerank."""
+    provider = "cohere"
+
+    async def rerank(self, **kwargs) -> RerankResponse:
+        return await self._acall(_rerank_request(kwargs), lambda: self.client.rerank(**kwargs),
+                                 _encode_rerank, _decode_rerank)
+
+
+def _rerank_request(kwargs: dict) -> Dict[str, Any]:
+    return {k: v for k, v in kwargs.items() if k != "request_options"}
+
+
+def _encode_message(message: AIMessage) -> Dict[str, Any]:
+    return {"content": message.content, "usage_metadata": getattr(message, "usage_metadata", None)}
+
+
+def _decode_message(data: Dict[str, Any]) -> AIMessage:
+    return AIMessage(content=data["content"], usage_metadata=data["usage_metadata"])
+
+
+def _encode_rerank(response: RerankResponse) -> List[List[float]]:
+    return [[r.index, r.relevance_score] for r in response.results]
+
+
+def _decode_rerank(data: List[List[float]]) -> RerankResponse:
+    return RerankResponse(results=[RerankResponseResultsItem(index=int(i), relevance_score=s) for i, s in data])
+
+
+_store: ReplayStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_replay_store() -> ReplayStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReplayStore(config.api_replay_path)
+    return _store
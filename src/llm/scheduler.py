@@ -0,0 +1,281 @@
+# src/llm/scheduler.py
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from src.config import config
+from src.common import tracing
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# How often a waiting async caller re-checks for a free slot.
+POLL_SECONDS = 0.02
+# Minimum time between two multiplicative decreases, so one burst of 429s halves once.
+DECREASE_COOLDOWN_SECONDS = 2.0
+# Replayed responses cost nothing upstream, so replay mode runs effectively unthrottled.
+REPLAY_CONCURRENCY = 1024
+
+
+class TokenBucket:
+    """
+    Continuous-refill bucket holding up to `per_minute` units. `reserve` always
+    succeeds and returns how long the caller must wait before its units are
+    available, so waiting works the same for threads and coroutines.
+    """
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= min(amount, self.capacity)
+            return -self.level / self.rate if self.level < 0 else 0.0
+
+    def adjust(self, amount: float) -> None:
+        """Returns (negative) or charges (positive) units once the real cost is known."""
+        with self._lock:
+            self.level = min(self.capacity, self.level - amount)
+
+
+class RequestScheduler:
+    """
+    Shared gate in front of one API provider.
+
+    Every call reserves from a requests/min and a tokens/min bucket, then waits for
+    one of `concurrency` slots. The slot count adapts AIMD-style: +1/limit per
+    success, halved on a rate limit (429) or, with `target_latency`, on a slow
+    call. Retryable failures are retried with full-jitter exponential backoff,
+    honouring Retry-After when the provider sends it.
+    """
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 16, min_concurrency: int = 1, max_retries: int = 6,
+                 base_delay: float = 1.0, max_delay: float = 60.0, target_latency: float = 0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._waiting = 0
+        self._last_decrease = 0.0
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0, "errors": 0,
+                       "throttled_seconds": 0.0, "backoff_seconds": 0.0}
+
+    def call(self, fn: Callable[[], T], tokens: int = 0, actual_tokens: Callable[[T], int | None] = None) -> T:
+        """
+        Runs `fn` under the provider's limits. `tokens` is reserved once, up front
+        (retries only take another request), and refunded if the call gives up;
+        `actual_tokens(result)`, when given and not None, settles the real count.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._sleep(self._reserve(tokens if attempt == 0 else 0))
+            self._acquire_slot()
+            start, succeeded = time.monotonic(), False
+            try:
+                result = fn()
+                succeeded = True
+            except Exception as e:
+                delay = self._on_error(e, attempt, tokens)
+                if delay is None:
+                    raise
+            finally:
+                self._release_slot(time.monotonic() - start if succeeded else None)
+            if not succeeded:
+                self._sleep(delay, backoff=True)
+                continue
+            self._settle_tokens(tokens, result, actual_tokens)
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], tokens: int = 0,
+                    actual_tokens: Callable[[T], int | None] = None) -> T:
+        for attempt in range(self.max_retries + 1):
+            await self._asleep(self._reserve(tokens if attempt == 0 else 0))
+            await self._aacquire_slot()
+            start, succeeded = time.monotonic(), False
+            try:
+                result = await fn()
+                succeeded = True
+            except Exception as e:
+                delay = self._on_error(e, attempt, tokens)
+                if delay is None:
+                    raise
+            finally:
+                # Also runs on cancellation (a BaseException), so the slot is never lost.
+                self._release_slot(time.monotonic() - start if succeeded else None)
+            if not succeeded:
+                await self._asleep(delay, backoff=True)
+                continue
+            self._settle_tokens(tokens, result, actual_tokens)
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters since start; throttled/backoff seconds are summed over all waiting callers."""
+        with self._lock:
+            return {
+                **self._stats,
+                "queue_depth": self._waiting,
+                "in_flight": self._in_flight,
+                "concurrency_limit": int(self.concurrency),
+            }
+
+    def _reserve(self, tokens: int) -> float:
+        wait = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def _acquire_slot(self) -> None:
+        with self._slot_freed:
+            self._waiting += 1
+            start = time.monotonic()
+            try:
+                while self._in_flight >= int(self.concurrency):
+                    self._slot_freed.wait()
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+            self._stats["throttled_seconds"] += time.monotonic() - start
+
+    async def _aacquire_slot(self) -> None:
+        # Polls instead of blocking a thread, so many coroutines can wait at once.
+        with self._lock:
+            self._waiting += 1
+        start = time.monotonic()
+        try:
+            while True:
+                with self._lock:
+                    if self._in_flight < int(self.concurrency):
+                        self._in_flight += 1
+                        self._stats["throttled_seconds"] += time.monotonic() - start
+                        return
+                await asyncio.sleep(POLL_SECONDS)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def _release_slot(self, latency: float | None) -> None:
+        """Frees a slot; `latency` is set for a successful call, which also grows the limit."""
+        with self._slot_freed:
+            self._in_flight -= 1
+            if latency is not None:
+                self._stats["requests"] += 1
+                if self.target_latency and latency > self.target_latency:
+                    self._decrease()
+                else:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            self._slot_freed.notify_all()
+
+    def _settle_tokens(self, tokens: int, result, actual_tokens) -> None:
+        used = actual_tokens(result) if actual_tokens is not None else None
+        if self.tokens and used is not None:
+            self.tokens.adjust(used - tokens)
+
+    def _on_error(self, error: Exception, attempt: int, tokens: int) -> float | None:
+        """Backoff delay before retrying `error`, or None to give up (refunding the call's `tokens`)."""
+        status = _status_code(error)
+        with self._lock:
+            self._stats["errors"] += 1
+            if status == 429:
+                self._stats["rate_limited"] += 1
+                self._decrease()
+            give_up = not _is_retryable(error, status) or attempt >= self.max_retries
+            if not give_up:
+                self._stats["retries"] += 1
+        if give_up:
+            if self.tokens and tokens:
+                self.tokens.adjust(-tokens)
+            return None
+        tracing.count("retries")
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            # A bogus header must not stall the caller indefinitely.
+            return min(max(retry_after, 0.0), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+            self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            self._last_decrease = now
+
+    def _sleep(self, seconds: float, backoff: bool = False) -> None:
+        if seconds > 0:
+            self._record_wait(seconds, backoff)
+            time.sleep(seconds)
+
+    async def _asleep(self, seconds: float, backoff: bool = False) -> None:
+        if seconds > 0:
+            self._record_wait(seconds, backoff)
+            await asyncio.sleep(seconds)
+
+    def _record_wait(self, seconds: float, backoff: bool) -> None:
+        with self._lock:
+            self._stats["backoff_seconds" if backoff else "throttled_seconds"] += seconds
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_retryable(error: Exception, status: int | None) -> bool:
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    name = type(error).__name__
+    return isinstance(error, (TimeoutError, ConnectionError)) or "Timeout" in name or "Connection" in name
+
+
+def _retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str) -> RequestScheduler:
+    """The process-wide scheduler for "openai" or "cohere", configured from config."""
+    if config.api_replay_mode == "replay":
+        provider = "replay"
+    with _schedulers_lock:
+        if provider == "replay" and provider not in _schedulers:
+            _schedulers[provider] = RequestScheduler(provider, max_concurrency=REPLAY_CONCURRENCY)
+        if provider not in _schedulers:
+            _schedulers[provider] = RequestScheduler(
+                provider,
+                requests_per_minute=getattr(config, f"{provider}_requests_per_minute"),
+                tokens_per_minute=getattr(config, f"{provider}_tokens_per_minute", 0),
+                max_concurrency=getattr(config, f"{provider}_max_concurrency"),
+                max_retries=config.api_max_retries,
+                target_latency=config.api_target_latency_seconds,
+            )
+        return _schedulers[provider]
+
+
+def scheduler_metrics() -> Dict[str, Dict[str, Any]]:
+    with _schedulers_lock:
+        return {name: scheduler.metrics() for name, scheduler in _schedulers.items()}
@@ -0,0 +1,21 @@
+# src/llm/tokens.py
+
+from functools import lru_cache
+
+import tiktoken
+
+from src.llm.openai_llm import MODEL_NAME
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = MODEL_NAME) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=100_000)
+def count_tokens(text: str) -> int:
+    """Tokens in `text` for the generation model. Cached, since the same rows and sentences recur across prompts."""
+    return len(get_encoding().encode(text, disallowed_special=()))
@@ -0,0 +1,47 @@
+# src/reranker/__init__.py
+
+import threading
+
+from src.config import config
+from .base import Reranker
+from .cohere_reranker import CohereReranker
+
+_rerankers: dict[str, Reranker] = {}
+_lock = threading.Lock()
+
+
+def is_cohere_model(model_name: str) -> bool:
+    return model_name.startswith("rerank-")
+
+
+def get_reranker(model_name: str = None) -> Reranker:
+    """
+    Returns the shared reranker for `model_name` (default `config.reranker_model_name`).
+    Cohere model names ("rerank-...") use the API; anything else is loaded as a
+    local CrossEncoder.
+    """
+    model_name = model_name or config.reranker_model_name
+    with _lock:
+        if model_name not in _rerankers:
+            if is_cohere_model(model_name):
+                _rerankers[model_name] = CohereReranker(model_name)
+            else:
+                from .cross_encoder_reranker import CrossEncoderReranker
+
+                _rerankers[model_name] = CrossEncoderReranker(
+                    model_name,
+                    backend=config.reranker_backend,
+                    batch_size=config.reranker_batch_size,
+                    quantize=config.reranker_quantize,
+                    onnx_file_name=config.reranker_onnx_file_name,
+                )
+        return _rerankers[model_name]
+
+
+def clear_rerankers() -> None:
+    """Drops every loaded reranker; the next get_reranker call rebuilds it from config."""
+    with _lock:
+        _rerankers.clear()
+
+
+__all__ = ["Reranker", "CohereReranker", "get_reranker", "clear_rerankers", "is_cohere_model"]
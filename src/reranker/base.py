@@ -0,0 +1,19 @@
+# src/reranker/base.py
+
+from abc import ABC, abstractmethod
+from typing import List
+
+from src.common import tracing
+
+
+class Reranker(ABC):
+    """
+    Scores candidate passages against a query. Implementations return the
+    indices of the `top_n` best candidates, best first.
+    """
+    @abstractmethod
+    def rerank(self, query: str, documents: List[str], top_n: int) -> List[int]:
+        ...
+
+    async def arerank(self, query: str, documents: List[str], top_n: int) -> List[int]:
+        return await tracing.to_thread(self.rerank, query, documents, top_n)
@@ -0,0 +1,31 @@
+# src/reranker/cohere_reranker.py
+
+from typing import List
+
+from src.llm.scheduler import get_scheduler
+from src.reranker.base import Reranker
+
+# Retries are owned by the shared scheduler, not the SDK.
+REQUEST_OPTIONS = {"max_retries": 0}
+
+
+class CohereReranker(Reranker):
+    """Hosted rerank models (e.g. rerank-english-v3.0) through the Cohere API."""
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def rerank(self, query: str, documents: List[str], top_n: int) -> List[int]:
+        from src.llm.cohere_client import cohere_client  # Local import to avoid circular
+
+        response = get_scheduler("cohere").call(lambda: cohere_client.rerank(
+            model=self.model_name, query=query, documents=documents, top_n=top_n, request_options=REQUEST_OPTIONS
+        ))
+        return [r.index for r in response.results]
+
+    async def arerank(self, query: str, documents: List[str], top_n: int) -> List[int]:
+        from src.llm.cohere_client import async_cohere_client  # Local import to avoid circular
+
+        response = await get_scheduler("cohere").acall(lambda: async_cohere_client.rerank(
+            model=self.model_name, query=query, documents=documents, top_n=top_n, request_options=REQUEST_OPTIONS
+        ))
+        return [r.index for r in response.results]
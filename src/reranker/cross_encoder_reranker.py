@@ -0,0 +1,37 @@
+# src/reranker/cross_encoder_reranker.py
+
+import threading
+from typing import List
+
+import numpy as np
+from sentence_transformers import CrossEncoder
+
+from src.reranker.base import Reranker
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Local sentence-transformers CrossEncoder, scoring (query, passage) pairs in batches.
+
+    `backend="onnx"` runs through ONNX Runtime (optionally a specific, e.g. int8
+    quantized, `onnx_file_name` from the model repo). With the torch backend,
+    `quantize=True` applies dynamic int8 quantization to the Linear layers for CPU.
+    """
+    def __init__(self, model_name: str, backend: str = "torch", batch_size: int = 32,
+                 quantize: bool = False, onnx_file_name: str = None, max_length: int = 512):
+        model_kwargs = {"file_name": onnx_file_name} if backend == "onnx" and onnx_file_name else None
+        self.model = CrossEncoder(model_name, device="cpu", backend=backend, max_length=max_length, model_kwargs=model_kwargs)
+        self.batch_size = batch_size
+        if quantize and backend == "torch":
+            import torch
+
+            self.model.model = torch.quantization.quantize_dynamic(self.model.model, {torch.nn.Linear}, dtype=torch.qint8)
+        # torch modules are not safe to call concurrently from several threads.
+        self._lock = threading.Lock()
+
+    def rerank(self, query: str, documents: List[str], top_n: int) -> List[int]:
+        if not documents:
+            return []
+        with self._lock:
+            scores = self.model.predict([(query, doc) for doc in documents], batch_size=self.batch_size, show_progress_bar=False)
+        return np.argsort(-np.asarray(scores), kind="stable")[:top_n].tolist()
@@ -0,0 +1,200 @@
+# src/service/app.py
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+from flask import Flask, jsonify
+from flask_pydantic import validate
+from pydantic import BaseModel, Field
+
+from src.config import config
+from src.agent.pipeline import run_agent_pipeline
+from src.common.tracing import percentiles
+from src.llm.scheduler import scheduler_metrics
+from src.llm.tokens import count_tokens
+from src.reranker import get_reranker
+from src.vector_store.micro_batcher import get_batcher
+from src.vector_store.registry import get_retriever
+
+# Completed requests kept per endpoint for latency percentiles and throughput.
+METRICS_WINDOW = 1000
+THROUGHPUT_SECONDS = 60
+# Per-request bounds on /search, so one request cannot push an arbitrarily large
+# batch into the retriever (retrieval_batch_max_queries only groups requests).
+MAX_SEARCH_QUERIES = 32
+MAX_SEARCH_K = 1000
+
+
+class AskRequest(BaseModel):
+    question: str
+    use_cache: bool | None = None
+
+
+class AskResponse(BaseModel):
+    answer: str
+    generation: str
+    program: str
+    documents: List[str]
+    reranked_documents: List[str]
+    token_usage: Dict[str, Dict[str, int]]
+    step_timings: Dict[str, Dict[str, float]]
+    latency: float
+
+
+class SearchRequest(BaseModel):
+    queries: List[str] = Field(min_length=1, max_length=MAX_SEARCH_QUERIES)
+    k: int | None = Field(None, gt=0, le=MAX_SEARCH_K)
+    filters: Dict[str, List[str]] | None = None
+
+
+class SearchHit(BaseModel):
+    id: str
+    doc_id: str
+    text: str
+
+
+class SearchResponse(BaseModel):
+    hits: List[SearchHit]
+    latency: float
+
+
+class ServiceMetrics:
+    """Per-endpoint request counts, errors, latency percentiles and recent throughput."""
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._latencies: Dict[str, deque] = {}
+        self._finished: Dict[str, deque] = {}
+
+    def start(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def finish(self, endpoint: str, latency: float, ok: bool) -> None:
+        now = time.time()
+        with self._lock:
+            self._in_flight -= 1
+            counts = self._counts.setdefault(endpoint, {"requests": 0, "errors": 0})
+            counts["requests"] += 1
+            counts["errors"] += not ok
+            self._latencies.setdefault(endpoint, deque(maxlen=METRICS_WINDOW)).append(latency)
+            self._finished.setdefault(endpoint, deque(maxlen=METRICS_WINDOW)).append(now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    **counts,
+                    **percentiles(list(self._latencies[endpoint])),
+                    "requests_per_second": sum(now - t <= THROUGHPUT_SECONDS for t in self._finished[endpoint])
+                    / min(THROUGHPUT_SECONDS, max(now - self.started, 1e-9)),
+                }
+                for endpoint, counts in self._counts.items()
+            }
+            in_flight = self._in_flight
+        return {"uptime_seconds": now - self.started, "in_flight": in_flight, "endpoints": endpoints}
+
+
+def warm_up(ready: threading.Event, failures: List[Exception]) -> None:
+    """
+    Loads the index, embedding model, reranker and tokenizer once, before traffic
+    arrives. A failure is appended to `failures` (reported by /ready) instead of
+    silently ending the thread.
+    """
+    start = time.perf_counter()
+    try:
+        retriever = get_retriever()
+        retriever.embedding_model.embed_queries(["warm up"])
+        get_reranker()
+        count_tokens("warm up")
+        get_batcher()
+    except Exception as e:
+        failures.append(e)
+        print(f"[INFO] Service warm-up failed ({type(e).__name__}: {e}); /ready reports the error.")
+        return
+    ready.set()
+    print(f"[INFO] Service warm in {time.perf_counter() - start:.1f}s; ready for requests.")
+
+
+def create_app(warm: bool = True) -> Flask:
+    """
+    The query service. Models and indexes stay loaded across requests; with
+    `config.retrieval_batch_window_ms` > 0, concurrent requests' retrievals are
+    micro-batched. Endpoints: POST /ask, POST /search, GET /health, /ready, /metrics.
+    """
+    app = Flask(__name__)
+    metrics = ServiceMetrics()
+    ready = threading.Event()
+    failures: List[Exception] = []
+    if warm:
+        threading.Thread(target=warm_up, args=(ready, failures), name="warm-up", daemon=True).start()
+    else:
+        ready.set()
+
+    def timed(endpoint: str, fn):
+        metrics.start()
+        start, ok = time.perf_counter(), False
+        try:
+            result = fn(start)
+            ok = True
+            return result
+        finally:
+            metrics.finish(endpoint, time.perf_counter() - start, ok)
+
+    @app.post("/ask")
+    @validate()
+    def ask(body: AskRequest):
+        def run(start: float) -> AskResponse:
+            state = run_agent_pipeline(body.question, use_cache=body.use_cache)
+            return AskResponse(
+                answer=state.answer,
+                generation=state.generation,
+                program=state.program,
+                documents=[doc.metadata.get("id", "") for doc in state.documents],
+                reranked_documents=[doc.metadata.get("id", "") for doc in state.reranked_documents],
+                token_usage=state.token_usage,
+                step_timings=state.step_timings,
+                latency=time.perf_counter() - start,
+            )
+        return timed("ask", run)
+
+    @app.post("/search")
+    @validate()
+    def search(body: SearchRequest):
+        def run(start: float) -> SearchResponse:
+            searcher = get_batcher() or get_retriever()
+            k = config.top_k_retrieval if body.k is None else body.k
+            docs = searcher.batch_similarity_search(body.queries, k=k, filters=body.filters)
+            hits = [SearchHit(id=doc.metadata["id"], doc_id=doc.metadata["doc_id"], text=doc.page_content)
+                    for doc in docs]
+            return SearchResponse(hits=hits, latency=time.perf_counter() - start)
+        return timed("search", run)
+
+    @app.get("/health")
+    def health():
+        return jsonify(status="ok")
+
+    @app.get("/ready")
+    def readiness():
+        if failures:
+            error = failures[0]
+            return jsonify(status="failed", error=f"{type(error).__name__}: {error}"), 503
+        if not ready.is_set():
+            return jsonify(status="warming up"), 503
+        return jsonify(status="ready")
+
+    @app.get("/metrics")
+    def service_metrics():
+        batcher = get_batcher() if ready.is_set() else None
+        return jsonify(
+            **metrics.snapshot(),
+            retrieval_batching=batcher.metrics() if batcher is not None else None,
+            api_schedulers=scheduler_metrics(),
+        )
+
+    return app
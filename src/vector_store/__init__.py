@@ -2,4 +2,5 @@
 
 from .embedding_model import EmbeddingModel
 from .retriever import VectorRetriever
-from .builder import IndexBuilder 
\ No newline at end of file
+from .builder import IndexBuilder
+from .registry import get_retriever, clear_retrievers, index_version
@@ -0,0 +1,131 @@
+# src/vector_store/array_store.py
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+MAGIC = b"FQAARR01"
+ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_arrays(path: Path, arrays: Dict[str, np.ndarray], meta: dict = None) -> None:
+    """
+    Writes named NumPy arrays into a single file that read_arrays can memory-map.
+
+    Layout: magic, uint64 header length, JSON header, then each array's raw bytes
+    at a 64-byte aligned offset. The file is written next to `path` and moved into
+    place with os.replace, so readers never observe a partially written file.
+    """
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+
+    # The header stores absolute offsets, so size it with widest-possible placeholders.
+    entries = {
+        name: {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": 10 ** 18}
+        for name, arr in arrays.items()
+    }
+    header = {"meta": meta or {}, "arrays": entries}
+    probe = json.dumps(header).encode("utf-8")
+    offset = _aligned(len(MAGIC) + 8 + len(probe))
+    for name, arr in arrays.items():
+        entries[name]["offset"] = offset
+        offset = _aligned(offset + arr.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(entries[name]["offset"])
+            f.write(memoryview(arr.reshape(-1).view(np.uint8)))
+        f.truncate(max(offset, f.tell()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_arrays(path: Path) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    Memory-maps a file written by write_arrays. Returns (meta, arrays); the arrays
+    are read-only views into the mapping, so loading is constant time.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an array store file.")
+    (header_len,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(buffer[start:start + header_len].decode("utf-8"))
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=entry["offset"]).reshape(shape)
+    return header["meta"], arrays
+
+
+class StringTable:
+    """
+    Read-only view over strings stored as one UTF-8 blob plus an offsets array.
+    """
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+
+class StringTableWriter:
+    """
+    Accumulates strings for a StringTable, storing each distinct string once.
+
+    The UTF-8 blob is spooled to an anonymous temporary file and strings are
+    deduplicated by digest, so memory holds one offset and one 16-byte digest
+    (plus dict overhead) per distinct string, not the text itself.
+    """
+    def __init__(self):
+        self._spool = tempfile.TemporaryFile()
+        self._size = 0
+        self._offsets = array("q", [0])
+        self._index: Dict[bytes, int] = {}
+
+    def add(self, text: str) -> int:
+        data = text.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        existing = self._index.get(digest)
+        if existing is not None:
+            return existing
+        self._spool.write(data)
+        self._size += len(data)
+        self._offsets.append(self._size)
+        self._index[digest] = len(self._offsets) - 2
+        return self._index[digest]
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        offsets = np.frombuffer(self._offsets, dtype=np.int64)
+        if self._size == 0:
+            return np.zeros(0, dtype=np.uint8), offsets
+        self._spool.flush()
+        return np.memmap(self._spool, dtype=np.uint8, mode="r", shape=(self._size,)), offsets
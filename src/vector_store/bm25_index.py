@@ -0,0 +1,198 @@
+# src/vector_store/bm25_index.py
+
+import hashlib
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from src.vector_store.array_store import read_arrays, write_arrays
+from src.vector_store.metadata_store import MetadataStore, DOC_CONTEXT, ROW_DOC, ROW_TEXT
+
+# Words and numbers; "1,234.5" and "12.5%" keep their digits together.
+TOKEN_RE = re.compile(r"[a-z]+|\d+(?:[.,]\d+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t.replace(",", "") for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def term_hash(term: str) -> int:
+    """64-bit term id; lets the vocabulary be a sorted integer array instead of a dict."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _term_hashes(terms) -> np.ndarray:
+    return np.fromiter((term_hash(t) for t in terms), dtype=np.uint64)
+
+
+class _Postings:
+    """One CSR inverted index (sorted term hashes, offsets, ids, term frequencies) plus its BM25 statistics."""
+    def __init__(self, arrays: dict, meta: dict, prefix: str, k1: float, b: float):
+        self.terms = arrays[f"{prefix}_terms"]
+        self.offsets = arrays[f"{prefix}_offsets"]
+        self.ids = arrays[f"{prefix}_ids"]
+        self.tfs = arrays[f"{prefix}_tfs"]
+        self.lengths = arrays[f"{prefix}_lengths"]
+        self.n_docs = meta[f"{prefix}_count"]
+        self.avg_length = meta[f"{prefix}_avg_length"] or 1.0
+        self.k1 = k1
+        self.b = b
+
+    def score(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted ids, BM25 scores) of every id in the postings of `hashes`; nothing else is touched."""
+        if not len(self.terms):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        positions = np.searchsorted(self.terms, hashes)
+        positions = positions[positions < len(self.terms)]
+        positions = positions[np.isin(self.terms[positions], hashes)]
+
+        ids, scores = [], []
+        for pos in positions:
+            start, end = self.offsets[pos], self.offsets[pos + 1]
+            df = end - start
+            idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+            posting_ids = self.ids[start:end]
+            tf = self.tfs[start:end]
+            norm = self.k1 * (1.0 - self.b + self.b * self.lengths[posting_ids] / self.avg_length)
+            ids.append(posting_ids)
+            scores.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        unique_ids, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        return unique_ids, np.bincount(inverse, weights=np.concatenate(scores))
+
+
+class BM25Index:
+    """
+    Memory-mapped BM25 index over the same row chunks as the FAISS index.
+
+    A row chunk is "table row + filing narrative". The narrative is indexed once
+    per filing, not copied into every row: a row scores its own BM25 (over row
+    texts) plus its filing's BM25 (over narratives), so rows of one filing share
+    the narrative part and differ by their own terms. Postings are stored CSR-style
+    per term, and `doc_rows` lists each filing's rows, so loading is constant time
+    and a query only touches the postings of its own terms (plus up to k rows of
+    the best-matching filings).
+    """
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75):
+        self.path = Path(path)
+        self.meta, arrays = read_arrays(self.path)
+        if self.meta.get("version") != 3:
+            raise ValueError(f"{self.path} was written by an older build; rebuild with `python -m src.vector_store.builder`.")
+        self.rows = _Postings(arrays, self.meta, "row", k1, b)
+        self.documents = _Postings(arrays, self.meta, "doc", k1, b)
+        self.row_docs = arrays["row_docs"]
+        self.doc_rows = arrays["doc_rows"]
+        self.doc_row_offsets = arrays["doc_row_offsets"]
+
+    def search(self, query: str, k: int, within: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (scores, FAISS ids) of the top `k` rows, best first, optionally only among the sorted ids `within`."""
+        hashes = np.unique(_term_hashes(tokenize(query)))
+        empty = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        if not len(hashes):
+            return empty
+        row_ids, row_scores = self.rows.score(hashes)
+        doc_ids, doc_scores = self.documents.score(hashes)
+
+        # Rows that match on their own text, plus their filing's score.
+        if within is not None:
+            keep = np.isin(row_ids, within, assume_unique=True)
+            row_ids, row_scores = row_ids[keep], row_scores[keep]
+        if len(row_ids) and len(doc_ids):
+            docs = self.row_docs[row_ids]
+            pos = np.minimum(np.searchsorted(doc_ids, docs), len(doc_ids) - 1)
+            matched = doc_ids[pos] == docs
+            row_scores[matched] += doc_scores[pos[matched]]
+
+        # Rows that match only through their filing all score the filing's BM25,
+        # so the best filings' first k such rows are the only ones that can rank.
+        extra_ids, extra_scores = [], []
+        needed = k
+        for i in np.argsort(-doc_scores, kind="stable"):
+            if needed <= 0:
+                break
+            doc = doc_ids[i]
+            rows = self.doc_rows[self.doc_row_offsets[doc]:self.doc_row_offsets[doc + 1]]
+            rows = rows[~np.isin(rows, row_ids)]
+            if within is not None:
+                rows = rows[np.isin(rows, within)]
+            rows = rows[:needed]
+            extra_ids.append(rows)
+            extra_scores.append(np.full(len(rows), doc_scores[i]))
+            needed -= len(rows)
+
+        candidates = np.concatenate([row_ids, *extra_ids]).astype(np.int64)
+        totals = np.concatenate([row_scores, *extra_scores])
+        if not len(candidates):
+            return empty
+        top = np.argpartition(-totals, min(k, len(totals)) - 1)[:k]
+        top = top[np.argsort(-totals[top], kind="stable")]
+        return totals[top].astype(np.float32), candidates[top]
+
+
+def _postings(prefix: str, terms: array, ids: array, tfs: array, lengths: np.ndarray, count: int) -> Tuple[dict, dict]:
+    terms = np.frombuffer(terms, dtype=np.uint64)
+    order = np.argsort(terms, kind="stable")
+    unique_terms, starts = np.unique(terms[order], return_index=True)
+    counted = lengths[lengths > 0]
+    return {
+        f"{prefix}_terms": unique_terms,
+        f"{prefix}_offsets": np.append(starts, len(terms)).astype(np.int64),
+        f"{prefix}_ids": np.frombuffer(ids, dtype=np.int64)[order],
+        f"{prefix}_tfs": np.frombuffer(tfs, dtype=np.float32)[order],
+        f"{prefix}_lengths": lengths,
+    }, {
+        f"{prefix}_count": count,
+        f"{prefix}_avg_length": float(counted.mean()) if len(counted) else 0.0,
+    }
+
+
+def _add_postings(counts: Counter, doc_id: int, terms: array, ids: array, tfs: array) -> int:
+    terms.extend(_term_hashes(counts.keys()).tolist())
+    ids.extend([doc_id] * len(counts))
+    tfs.extend(counts.values())
+    return sum(counts.values())
+
+
+def build_bm25_index(metadata: MetadataStore, path: Path) -> None:
+    """
+    Indexes every live row of `metadata` by its own table row text, and every
+    filing with a live row by its narrative, once.
+    """
+    row_postings = array("Q"), array("q"), array("f")
+    doc_postings = array("Q"), array("q"), array("f")
+    row_lengths = np.zeros(len(metadata), dtype=np.float32)
+    doc_lengths = np.zeros(len(metadata.documents), dtype=np.float32)
+    row_docs = np.full(len(metadata), -1, dtype=np.int64)
+    indexed = np.zeros(len(metadata.documents), dtype=bool)
+
+    for faiss_id in np.flatnonzero(metadata.rows[:, ROW_DOC] >= 0):
+        doc_index = int(metadata.rows[faiss_id, ROW_DOC])
+        row_docs[faiss_id] = doc_index
+        row_counts = Counter(tokenize(metadata.strings[metadata.rows[faiss_id, ROW_TEXT]]))
+        row_lengths[faiss_id] = _add_postings(row_counts, int(faiss_id), *row_postings)
+        if not indexed[doc_index]:
+            context = Counter(tokenize(metadata.strings[metadata.documents[doc_index, DOC_CONTEXT]]))
+            doc_lengths[doc_index] = _add_postings(context, doc_index, *doc_postings)
+            indexed[doc_index] = True
+
+    live = np.flatnonzero(row_docs >= 0)
+    doc_rows = live[np.argsort(row_docs[live], kind="stable")]
+    doc_row_offsets = np.zeros(len(metadata.documents) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_docs[live], minlength=len(metadata.documents)), out=doc_row_offsets[1:])
+
+    row_arrays, row_meta = _postings("row", *row_postings, row_lengths, len(live))
+    doc_arrays, doc_meta = _postings("doc", *doc_postings, doc_lengths, int(indexed.sum()))
+    write_arrays(path, {
+        **row_arrays, **doc_arrays,
+        "row_docs": row_docs,
+        "doc_rows": doc_rows.astype(np.int64),
+        "doc_row_offsets": doc_row_offsets,
+    }, meta={"format": "bm25", "version": 3, "build_id": metadata.meta.get("build_id"), **row_meta, **doc_meta})
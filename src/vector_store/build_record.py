@@ -0,0 +1,39 @@
+# src/vector_store/build_record.py
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+
+class IncompleteBuildError(ValueError):
+    """The files on disk belong to different builds (a build is being published)."""
+
+
+def new_build_id() -> str:
+    return uuid.uuid4().hex
+
+
+def write_build_record(path: Path, build_id: str, index_path: Path) -> None:
+    """
+    Publishes a build. Written last, after the FAISS index and every array store
+    (each stamped with `build_id`) are in place; readers reload only when it changes.
+    """
+    path = Path(path)
+    stat = Path(index_path).stat()
+    record = {"build_id": build_id, "index_size": stat.st_size, "index_mtime_ns": stat.st_mtime_ns}
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(record))
+    os.replace(tmp_path, path)
+
+
+def read_build_record(path: Path) -> dict | None:
+    """The published build record; None if no build has been published yet."""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def index_matches(record: dict, index_stat: os.stat_result) -> bool:
+    return (index_stat.st_size, index_stat.st_mtime_ns) == (record["index_size"], record["index_mtime_ns"])
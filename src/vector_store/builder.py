@@ -1,66 +1,274 @@
 # src/vector_store/builder.py
 
+import argparse
+import tempfile
+import time
+from array import array
+from collections import Counter
+import numpy as np
 import pandas as pd
 import faiss
-import pickle
+from itertools import islice
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Tuple
 from src.config import config
 from src.common.types import DocumentChunk
-from src.vector_store.embedding_model import embedding_model
-from src.common.utils import ensure_dir  
+from src.vector_store.embedding_model import get_embedding_model
+from src.vector_store.metadata_store import MetadataStore, MetadataStoreWriter
+from src.vector_store.bm25_index import build_bm25_index
+from src.vector_store.facet_index import build_facet_index
+from src.vector_store.table_store import build_table_store
+from src.vector_store.index_factory import create_index, supports_removal, train_index, with_ids
+from src.vector_store.manifest import ChunkManifest
+from src.vector_store.build_record import new_build_id, write_build_record
+from src.common.utils import ensure_dir
 
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+
+class RemovalUnsupportedError(Exception):
+    """An incremental update needs to remove vectors from an index type that cannot."""
+
+
+class StreamingIndexWriter:
+    """
+    Adds embedding batches to a FAISS index as they arrive.
+
+    Index types that need training (IVF, PQ) cannot take vectors before they are
+    trained, so every batch is spooled to a temporary file while a uniform
+    reservoir sample of `train_size` vectors is kept in memory. The CSV is ordered
+    by filing, so training on the first vectors would fit the centroids to the
+    first companies and years only. When updating an existing index, ids below
+    `replace_below` (the previous build's next id) are re-embedded chunks, so they
+    are removed before their new vectors are added.
+    """
+    def __init__(self, dim: int, index: faiss.Index = None, replace_below: int = 0):
+        self.dim = dim
+        self.index = index
+        self.replace_below = replace_below
+        self.train_size = config.index_train_size
+        self._sample = np.empty((0, dim), dtype=np.float32)
+        self._seen = 0
+        self._spool = None
+        self._spool_ids = array("q")
+        self._rng = np.random.default_rng(0)
+        # Only an existing index (incremental update) ever has vectors removed.
+        self.removable = index is None or supports_removal(index)
+        if self.index is None:
+            probe = create_index(dim, self.train_size)
+            if probe.is_trained:
+                self.index = with_ids(probe)
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        if self.index is None:
+            self._spool_batch(vectors, ids)
+            return
+
+        if self.replace_below:
+            stale = ids[ids < self.replace_below]
+            if len(stale):
+                self.remove(stale)
+        self.index.add_with_ids(vectors, ids)
+
+    def remove(self, ids: np.ndarray) -> None:
+        if not self.removable:
+            raise RemovalUnsupportedError(f"{config.index_type} index does not support removal")
+        self.index.remove_ids(ids)
+
+    def finish(self) -> faiss.Index:
+        if self.index is None:
+            self._train_and_flush()
+        return self.index
+
+    def _spool_batch(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile()
+            self._sample = np.empty((self.train_size, self.dim), dtype=np.float32)
+        self._spool.write(memoryview(vectors.reshape(-1).view(np.uint8)))
+        self._spool_ids.extend(ids.tolist())
+
+        # Reservoir sampling (Algorithm R): vector t replaces a random slot with probability train_size / (t + 1).
+        positions = self._seen + np.arange(len(vectors))
+        fill = positions < self.train_size
+        self._sample[positions[fill]] = vectors[fill]
+        rest = np.flatnonzero(~fill)
+        slots = self._rng.integers(0, positions[rest] + 1) if len(rest) else rest
+        for i, slot in zip(rest[slots < self.train_size], slots[slots < self.train_size]):
+            self._sample[slot] = vectors[i]
+        self._seen += len(vectors)
+
+    def _train_and_flush(self) -> None:
+        sample = self._sample[:min(self._seen, self.train_size)]
+        print(f"[INFO] Training {config.index_type} index on {len(sample)} of {self._seen} vectors...")
+        self.index = with_ids(create_index(self.dim, len(sample)))
+        train_index(self.index, sample)
+        self._sample = np.empty((0, self.dim), dtype=np.float32)
+        if not self._seen:
+            return
+
+        self._spool.flush()
+        vectors = np.memmap(self._spool, dtype=np.float32, mode="r", shape=(self._seen, self.dim))
+        ids = np.frombuffer(self._spool_ids, dtype=np.int64)
+        for start in range(0, self._seen, config.embedding_batch_size):
+            end = start + config.embedding_batch_size
+            self.index.add_with_ids(np.ascontiguousarray(vectors[start:end]), ids[start:end])
+        del vectors
+        self._spool.close()
+        self._spool, self._spool_ids, self._seen = None, array("q"), 0
+
+
 class IndexBuilder:
     def __init__(self):
         self.index_path = config.faiss_index_path
         self.metadata_path = config.metadata_path
+        self.manifest_path = config.manifest_path
+        self.bm25_path = config.bm25_index_path
+        self.facet_path = config.facet_index_path
+        self.table_path = config.table_store_path
+        self.build_record_path = config.build_record_path
         self.data_path = config.data_path
 
-    def load_data(self) -> List[DocumentChunk]:
-        df = pd.read_csv(self.data_path).fillna("")
-        chunks = []
-        for _, row in df.iterrows():
-            table_rows = row["table_markdown"].strip().split("\n")
-            for i, table_row in enumerate(table_rows):
-                chunk_id = f"{row['id']}::row_{i}"
-                combined = f"{table_row.strip()}\n\n{row['context'].strip()}"
-                chunks.append(DocumentChunk(id=chunk_id, text=combined))
-        return chunks
-
-    def build_faiss_index(self, embeddings: List[List[float]]) -> faiss.IndexFlatL2:
-        dim = len(embeddings[0])
-        index = faiss.IndexFlatL2(dim)
-        index.add(np.array(embeddings).astype("float32"))
-        return index
-
-    def run(self):
-        print("[INFO] Loading and chunking data...")
-        chunks = self.load_data()
-
-        print("[INFO] Embedding chunks...")
-        texts = [chunk["text"] for chunk in chunks]
-        embeddings = embedding_model.embed_documents(texts)
-
-        print("[INFO] Building FAISS index...")
-        index = self.build_faiss_index(embeddings)
-        ensure_dir(self.index_path.parent) 
+    def load_data(self, manifest: ChunkManifest, metadata: MetadataStoreWriter) -> Iterator[DocumentChunk]:
+        """
+        Streams the CSV in row chunks, records every table row in the metadata and
+        assigns its FAISS id from the manifest. Yields only the chunks that need embedding.
+        """
+        occurrences = Counter()
+        for df in pd.read_csv(self.data_path, chunksize=config.build_csv_chunk_rows):
+            df = df.fillna("")
+            for row in df.itertuples(index=False):
+                table_markdown = row.table_markdown.strip()
+                context = row.context.strip()
+                doc_index = metadata.add_document(row.id, table_markdown, context)
+                # A document id repeated in the CSV keys its rows by occurrence, so the
+                # repeats keep separate manifest entries instead of overwriting each other.
+                occurrence = occurrences[row.id]
+                occurrences[row.id] += 1
+                key = row.id if occurrence == 0 else f"{row.id}#{occurrence}"
+                for i, table_row in enumerate(table_markdown.split("\n")):
+                    chunk_id = f"{row.id}::row_{i}"
+                    combined = f"{table_row.strip()}\n\n{context}"
+                    faiss_id, needs_embedding = manifest.assign(f"{key}::row_{i}", combined)
+                    metadata.add_row(faiss_id, doc_index, i, table_row.strip())
+                    if needs_embedding:
+                        yield DocumentChunk(id=chunk_id, text=combined, faiss_id=faiss_id)
 
-        print(f"[INFO] Saving index to {self.index_path}...")
-        faiss.write_index(index, str(self.index_path))
+    def load_previous(self) -> Tuple[faiss.Index | None, ChunkManifest | None]:
+        """Loads the last build's index and manifest if an incremental update can reuse them."""
+        previous = ChunkManifest.load(self.manifest_path)
+        if previous is None or not self.index_path.exists():
+            print("[INFO] No previous build found; building from scratch.")
+            return None, None
+        if not previous.is_compatible(config.embedding_model_name, config.index_type):
+            print("[INFO] Embedding model or index type changed; building from scratch.")
+            return None, None
+        return faiss.read_index(str(self.index_path)), previous
+
+    def embed_batches(self, chunks: Iterator[DocumentChunk]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Embeds chunks in fixed-size batches, reporting throughput as it goes."""
+        start = last_report = time.perf_counter()
+        total = 0
+        while batch := list(islice(chunks, config.embedding_batch_size)):
+            vectors = get_embedding_model().encode_documents([chunk["text"] for chunk in batch])
+            ids = np.array([chunk["faiss_id"] for chunk in batch], dtype=np.int64)
+            total += len(batch)
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"[INFO] Embedded {total} chunks ({total / (now - start):.1f} chunks/s)...")
+                last_report = now
+            yield vectors, ids
+
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else 0.0
+        print(f"[INFO] Embedded {total} chunks in {elapsed:.1f}s ({rate:.1f} chunks/s).")
+
+    def write_side_indexes(self) -> None:
+        """Rebuilds the BM25, facet and parsed-table stores from the metadata just written (cheap next to embedding)."""
+        metadata = MetadataStore(self.metadata_path)
+        print(f"[INFO] Saving BM25 index to {self.bm25_path}...")
+        build_bm25_index(metadata, self.bm25_path)
+        print(f"[INFO] Saving facet index to {self.facet_path}...")
+        build_facet_index(metadata, self.facet_path)
+        print(f"[INFO] Saving parsed tables to {self.table_path}...")
+        build_table_store(metadata, self.table_path)
+
+    def write_index(self, index: faiss.Index) -> None:
+        """Writes next to the live index and swaps it in, so readers never see a partial file."""
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        faiss.write_index(index, str(tmp_path))
+        os.replace(tmp_path, self.index_path)
+
+    def run(self, incremental: bool = False):
+        embedding_model = get_embedding_model()
+        if config.embedding_workers > 1:
+            print(f"[INFO] Starting {config.embedding_workers} embedding worker processes...")
+            embedding_model.start_pool(config.embedding_workers, config.torch_threads_per_worker)
+        try:
+            self._run(incremental)
+        finally:
+            embedding_model.stop_pool()
 
+    def _run(self, incremental: bool):
+        index, previous = self.load_previous() if incremental else (None, None)
+        manifest = ChunkManifest(config.embedding_model_name, config.index_type, previous, path=self.manifest_path)
+        metadata = MetadataStoreWriter()
+        dim = get_embedding_model().model.get_sentence_embedding_dimension()
+        writer = StreamingIndexWriter(dim, index, previous.next_id if previous else 0)
+
+        print("[INFO] Streaming, embedding and indexing chunks...")
+        embedded = 0
+        try:
+            for vectors, ids in self.embed_batches(self.load_data(manifest, metadata)):
+                writer.add(vectors, ids)
+                embedded += len(ids)
+            deleted_ids = manifest.deleted_ids()
+            if index is not None and deleted_ids:
+                writer.remove(np.array(deleted_ids, dtype=np.int64))
+        except RemovalUnsupportedError as e:
+            # Only additions can be applied in place; rebuild (already embedded chunks come from the cache).
+            manifest.discard()
+            print(f"[INFO] {e}; rebuilding.")
+            return self._run(incremental=False)
+        except BaseException:
+            manifest.discard()
+            raise
+
+        if index is not None and not embedded and not deleted_ids:
+            manifest.discard()
+            if not all(path.exists() for path in (self.bm25_path, self.facet_path, self.table_path)):
+                self.write_side_indexes()
+                # Republish, so running processes reload and pick up the new side indexes.
+                build_id = MetadataStore(self.metadata_path).meta.get("build_id")
+                write_build_record(self.build_record_path, build_id, self.index_path)
+            print(" Index is up to date.")
+            return
+
+        index = writer.finish()
+        ensure_dir(self.index_path.parent)
+
+        # Every file is stamped with the build id and the build record is written
+        # last: readers reload only when the record changes, and check that the
+        # files they loaded all belong to the build it names.
+        build_id = new_build_id()
         print(f"[INFO] Saving metadata to {self.metadata_path}...")
-        with open(self.metadata_path, "wb") as f:
-            pickle.dump(chunks, f)
+        metadata.write(self.metadata_path, size=manifest.next_id, build_id=build_id)
+        self.write_side_indexes()
 
+        print(f"[INFO] Saving index to {self.index_path}...")
+        self.write_index(index)
+        manifest.save(self.manifest_path)
+        write_build_record(self.build_record_path, build_id, self.index_path)
 
         print(" Index build complete.")
 
 
 if __name__ == "__main__":
-    import numpy as np
+    parser = argparse.ArgumentParser(description="Build the FAISS vector store.")
+    parser.add_argument("--incremental", action="store_true", help="Only embed new or changed rows")
+    args = parser.parse_args()
+
     builder = IndexBuilder()
-    builder.run()
+    builder.run(incremental=args.incremental)
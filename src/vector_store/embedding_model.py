@@ -1,29 +1,123 @@
 # src/vector_store/embedding_model.py
 
+import threading
+import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Tuple
 from src.config import config
+from src.common import tracing
+from src.vector_store.embedding_cache import EmbeddingCache, get_embedding_cache
+from src.common.embedding_workers import EmbeddingWorkerPool
 
 class EmbeddingModel:
     """
     Wrapper around SentenceTransformer for consistent embedding logic.
     """
-    def __init__(self, model_name: str = None):
-        self.model_name = config.embedding_model_name
+    def __init__(self, model_name: str = None, use_cache: bool = True):
+        self.model_name = model_name or config.embedding_model_name
         self.model = SentenceTransformer(self.model_name)
+        self.cache = get_embedding_cache() if use_cache else None
+        self.pool: EmbeddingWorkerPool | None = None
+
+    def start_pool(self, workers: int, threads_per_worker: int = 0) -> None:
+        """
+        Moves encoding into `workers` processes (for CPU-only index builds) until
+        stop_pool() is called. Cache lookups still happen in this process.
+        """
+        self.stop_pool()
+        self.pool = EmbeddingWorkerPool(self.model_name, workers, threads_per_worker)
+
+    def stop_pool(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
         Embeds a list of document texts. Prefix for E5 models to improve retrieval relevance
         """
-        prefixed = [f"passage: {text.strip()}" for text in texts]
-        return self.model.encode(prefixed, convert_to_numpy=True).tolist()
+        return self.encode_documents(texts).tolist()
+
+    def encode_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Same as embed_documents but returns the float32 matrix without a list copy.
+        """
+        return self._encode("passage", texts)
 
     def embed_query(self, query: str) -> List[float]:
         """
         Embeds a user query. Prefix added.
         """
-        formatted = f"query: {query.strip()}"
-        return self.model.encode([formatted])[0].tolist()
+        return self._encode("query", [query])[0].tolist()
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embeds several user queries in a single encode batch. Returns a float32 matrix.
+        """
+        return self._encode("query", queries)
+
+    def embed_queries_with_hits(self, queries: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        embed_queries plus a boolean mask of the queries served from the cache, for
+        callers that charge the hits to someone else's step (see MicroBatcher).
+        """
+        return self._encode_with_hits("query", queries)
+
+    def _encode(self, prefix: str, texts: List[str]) -> np.ndarray:
+        vectors, hits = self._encode_with_hits(prefix, texts)
+        tracing.count("cache_hits", len({text.strip() for text, hit in zip(texts, hits) if hit}))
+        return vectors
+
+    def _encode_with_hits(self, prefix: str, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encodes `texts` with the E5 prefix, serving repeated texts from the cache
+        and only running the model on the misses.
+        """
+        texts = [text.strip() for text in texts]
+        if self.cache is None:
+            return self._run_model([f"{prefix}: {text}" for text in texts]), np.zeros(len(texts), dtype=bool)
+
+        keys = [EmbeddingCache.make_key(self.model_name, prefix, text) for text in texts]
+        cached = self.cache.get_many(list(set(keys)))
+        hits = np.array([key in cached for key in keys], dtype=bool)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            vectors = self._run_model([f"{prefix}: {text}" for text in missing.values()])
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update(computed)
+
+        vectors = np.vstack([cached[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+        return vectors, hits
+
+    def _run_model(self, texts: List[str]) -> np.ndarray:
+        if self.pool is not None:
+            return self.pool.encode(texts)
+        return self.model.encode(texts, convert_to_numpy=True).astype(np.float32, copy=False)
+
+
+_models: dict[str, EmbeddingModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str = None) -> EmbeddingModel:
+    """
+    Returns the process-wide EmbeddingModel for `model_name`, loading it on first use.
+    """
+    model_name = model_name or config.embedding_model_name
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                model = EmbeddingModel(model_name)
+                _models[model_name] = model
+    return model
+
 
-embedding_model = EmbeddingModel()
+def __getattr__(name: str):
+    # `embedding_model` is resolved on first access so that importing this module
+    # (e.g. in spawned embedding workers) does not load the model.
+    if name == "embedding_model":
+        return get_embedding_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,99 @@
+# src/vector_store/facet_index.py
+
+import re
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from src.common.utils import extract_years_from_text
+from src.vector_store.array_store import StringTable, StringTableWriter, read_arrays, write_arrays
+from src.vector_store.metadata_store import MetadataStore, DOC_ID, DOC_TABLE, ROW_DOC
+
+# ConvFinQA ids look like "Single_JKHY/2009/page_28.pdf-3" (or "Double_...").
+DOCUMENT_ID_RE = re.compile(r"^(?:[A-Za-z]+_)?(?P<ticker>[^/]+)/(?P<year>\d{4})/page_(?P<page>\d+)")
+
+
+def document_facets(doc_id: str, table_markdown: str) -> Dict[str, List[str]]:
+    """
+    Structured facets of a filing:
+      - ticker, filing_year, page: parsed from the document id
+      - header_year: years in the table's header row
+      - year: filing year or any header year, i.e. the years the document covers
+    """
+    facets: Dict[str, List[str]] = {}
+    match = DOCUMENT_ID_RE.match(doc_id)
+    if match:
+        facets["ticker"] = [match["ticker"].lower()]
+        facets["filing_year"] = [match["year"]]
+        facets["page"] = [str(int(match["page"]))]
+    header = table_markdown.split("\n", 1)[0]
+    facets["header_year"] = sorted(set(extract_years_from_text(header)))
+    facets["year"] = sorted(set(facets.get("filing_year", []) + facets["header_year"]))
+    return facets
+
+
+class FacetIndex:
+    """
+    Memory-mapped inverted index from "facet:value" keys to sorted FAISS ids,
+    used to restrict a search to matching rows before it runs.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta, arrays = read_arrays(self.path)
+        keys = StringTable(arrays["blob"], arrays["key_offsets"])
+        self.keys = {keys[i]: i for i in range(len(keys))}
+        self.offsets = arrays["offsets"]
+        self.ids = arrays["ids"]
+
+    def lookup(self, facet: str, values: Iterable[str]) -> np.ndarray:
+        """FAISS ids of the rows matching any of `values` for `facet`."""
+        postings = []
+        for value in values:
+            key = self.keys.get(f"{facet}:{str(value).lower()}")
+            if key is not None:
+                postings.append(self.ids[self.offsets[key]:self.offsets[key + 1]])
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(postings))
+
+    def matching_ids(self, filters: Dict[str, Iterable[str]]) -> np.ndarray:
+        """Rows matching every facet in `filters` (any value within a facet)."""
+        result = None
+        for facet, values in filters.items():
+            ids = self.lookup(facet, values)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        return result if result is not None else np.empty(0, dtype=np.int64)
+
+
+def build_facet_index(metadata: MetadataStore, path: Path) -> None:
+    """Extracts each document's facets once and posts them for every live row of the document."""
+    rows_by_doc: Dict[int, List[int]] = defaultdict(list)
+    for faiss_id in np.flatnonzero(metadata.rows[:, ROW_DOC] >= 0):
+        rows_by_doc[int(metadata.rows[faiss_id, ROW_DOC])].append(int(faiss_id))
+
+    postings: Dict[str, array] = defaultdict(lambda: array("q"))
+    for doc_index, row_ids in rows_by_doc.items():
+        document = metadata.documents[doc_index]
+        facets = document_facets(metadata.strings[document[DOC_ID]], metadata.strings[document[DOC_TABLE]])
+        for facet, values in facets.items():
+            for value in values:
+                postings[f"{facet}:{value}"].extend(row_ids)
+
+    keys = StringTableWriter()
+    offsets = array("q", [0])
+    ids = array("q")
+    for key in sorted(postings):
+        keys.add(key)
+        ids.extend(np.unique(np.frombuffer(postings[key], dtype=np.int64)).tolist())
+        offsets.append(len(ids))
+
+    blob, key_offsets = keys.to_arrays()
+    write_arrays(path, {
+        "blob": blob,
+        "key_offsets": key_offsets,
+        "offsets": np.frombuffer(offsets, dtype=np.int64),
+        "ids": np.frombuffer(ids, dtype=np.int64),
+    }, meta={"format": "facets", "version": 1, "build_id": metadata.meta.get("build_id")})
@@ -0,0 +1,95 @@
+# src/vector_store/index_factory.py
+
+import faiss
+import numpy as np
+
+from src.config import Config, config
+
+# FAISS warns (and clusters poorly) below ~39 training points per IVF centroid.
+MIN_POINTS_PER_CENTROID = 39
+
+
+def create_index(dim: int, n_train: int, cfg: Config = config) -> faiss.Index:
+    """
+    Creates an empty FAISS index of the type selected by `cfg.index_type`.
+    `n_train` is the number of vectors available for training; the IVF list count
+    and PQ code size are capped so that every centroid gets enough points.
+    """
+    nlist = max(1, min(cfg.ivf_nlist, n_train // MIN_POINTS_PER_CENTROID))
+    pq_nbits = max(1, min(cfg.pq_nbits, n_train.bit_length() - 1))
+
+    if cfg.index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if cfg.index_type == "ivf_flat":
+        return faiss.index_factory(dim, f"IVF{nlist},Flat")
+    if cfg.index_type == "ivf_pq":
+        return faiss.index_factory(dim, f"IVF{nlist},PQ{cfg.pq_m}x{pq_nbits}")
+    if cfg.index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, cfg.hnsw_m)
+        index.hnsw.efConstruction = cfg.hnsw_ef_construction
+        return index
+    raise ValueError(f"Unknown index type '{cfg.index_type}'.")
+
+
+def with_ids(index: faiss.Index) -> faiss.Index:
+    """
+    Makes `index` addressable by FAISS id. IVF indexes store ids in their inverted
+    lists already; wrapping them in an IDMap breaks after the first remove_ids,
+    because the IVF lists keep the old internal positions while the map is compacted.
+    """
+    try:
+        faiss.extract_index_ivf(index)
+        return index
+    except RuntimeError:
+        return faiss.IndexIDMap2(index)
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """HNSW graphs cannot delete vectors; every other index type built here can."""
+    base = index
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        base = faiss.downcast_index(base.index)
+    return not isinstance(base, faiss.IndexHNSW)
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray) -> None:
+    """Trains the index on `vectors` if its type needs training (IVF, PQ)."""
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def set_search_params(index: faiss.Index, cfg: Config = config) -> faiss.Index:
+    """Applies the nprobe / efSearch knobs from `cfg` to a loaded or freshly built index."""
+    try:
+        faiss.extract_index_ivf(index).nprobe = cfg.ivf_nprobe
+    except RuntimeError:
+        pass
+
+    base = index
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        base = faiss.downcast_index(base.index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = cfg.hnsw_ef_search
+    return index
+
+
+def filtered_search_params(index: faiss.Index, ids: np.ndarray, cfg: Config = config) -> faiss.SearchParameters:
+    """
+    SearchParameters that restrict a search to `ids` while keeping the nprobe /
+    efSearch knobs (per-call parameters replace the values set on the index).
+    The caller must keep the returned object alive for the duration of the search.
+    """
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(ids, dtype=np.int64))
+    try:
+        faiss.extract_index_ivf(index)
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=cfg.ivf_nprobe)
+    except RuntimeError:
+        base = index
+        if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            base = faiss.downcast_index(base.index)
+        if isinstance(base, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=cfg.hnsw_ef_search)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+    params.selector_ref = selector  # SWIG does not keep the selector alive on its own
+    return params
@@ -0,0 +1,129 @@
+# src/vector_store/manifest.py
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from src.common.utils import ensure_dir
+
+# Rows buffered before they are written to the manifest database.
+_FLUSH_ROWS = 10_000
+
+
+def chunk_hash(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class ChunkManifest:
+    """
+    Maps chunk ids to their stable FAISS id and the hash of the text that was embedded.
+
+    A new manifest is derived from the previous build's: unchanged chunks keep their
+    id and need no embedding, changed chunks keep their id but must be re-embedded,
+    and new chunks get the next unused id. Ids are never reused after deletion.
+
+    Both manifests live in SQLite (the new one in a temporary file next to `path`,
+    moved into place by save), so a build holds no per-chunk state in memory.
+    Without a `path` the manifest is a throwaway temporary database.
+    """
+    def __init__(self, embedding_model: str, index_type: str, previous: "ChunkManifest" = None, path: Path = None):
+        self.embedding_model = embedding_model
+        self.index_type = index_type
+        self.previous = previous
+        self.next_id = previous.next_id if previous else 0
+        self._pending: List[Tuple[str, int, bytes]] = []
+        self._tmp_path = Path(path).with_name(Path(path).name + ".tmp") if path else None
+        if self._tmp_path is not None:
+            ensure_dir(self._tmp_path.parent)
+            self._tmp_path.unlink(missing_ok=True)
+        self._conn = sqlite3.connect(str(self._tmp_path) if self._tmp_path else "")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE chunks (chunk_id TEXT PRIMARY KEY, faiss_id INTEGER NOT NULL, digest BLOB NOT NULL)")
+
+    def assign(self, chunk_id: str, text: str) -> Tuple[int, bool]:
+        """Returns (faiss id, needs embedding) for a chunk of the current build."""
+        digest = chunk_hash(text)
+        old = self.previous.lookup(chunk_id) if self.previous else None
+        if old is None:
+            faiss_id, needs_embedding = self.next_id, True
+            self.next_id += 1
+        else:
+            faiss_id, needs_embedding = old[0], old[1] != digest
+        self._pending.append((chunk_id, faiss_id, digest))
+        if len(self._pending) >= _FLUSH_ROWS:
+            self._flush()
+        return faiss_id, needs_embedding
+
+    def lookup(self, chunk_id: str) -> Optional[Tuple[int, bytes]]:
+        return self._conn.execute("SELECT faiss_id, digest FROM chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+
+    def deleted_ids(self) -> List[int]:
+        """Ids of the previous build whose chunk is absent from this one."""
+        if not self.previous:
+            return []
+        self._flush()
+        self._conn.commit()
+        self._conn.execute("ATTACH DATABASE ? AS previous", (str(self.previous.path),))
+        try:
+            rows = self._conn.execute(
+                "SELECT faiss_id FROM previous.chunks WHERE chunk_id NOT IN (SELECT chunk_id FROM main.chunks)"
+            ).fetchall()
+        finally:
+            self._conn.execute("DETACH DATABASE previous")
+        return [faiss_id for (faiss_id,) in rows]
+
+    def is_compatible(self, embedding_model: str, index_type: str) -> bool:
+        return self.embedding_model == embedding_model and self.index_type == index_type
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["ChunkManifest"]:
+        """Opens a saved manifest read-only; None if it is missing or not a manifest database."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        manifest = cls.__new__(cls)
+        manifest._conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            meta = dict(manifest._conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.DatabaseError:
+            manifest._conn.close()
+            return None
+        manifest.path = path
+        manifest.embedding_model = meta["embedding_model"]
+        manifest.index_type = meta["index_type"]
+        manifest.next_id = int(meta["next_id"])
+        manifest.previous = None
+        return manifest
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        if self._tmp_path is None or self._tmp_path != path.with_name(path.name + ".tmp"):
+            raise ValueError(f"Manifest was not opened for {path}.")
+        self._flush()
+        self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+            ("embedding_model", self.embedding_model),
+            ("index_type", self.index_type),
+            ("next_id", str(self.next_id)),
+        ])
+        self._conn.commit()
+        self.close()
+        os.replace(self._tmp_path, path)
+
+    def discard(self) -> None:
+        """Closes the manifest without saving it."""
+        self.close()
+        if self._tmp_path is not None:
+            self._tmp_path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        self._conn.close()
+        if self.previous is not None:
+            self.previous.close()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._conn.executemany("INSERT OR REPLACE INTO chunks (chunk_id, faiss_id, digest) VALUES (?, ?, ?)", self._pending)
+            self._pending = []
@@ -0,0 +1,96 @@
+# src/vector_store/metadata_store.py
+
+from array import array
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from src.vector_store.array_store import StringTable, StringTableWriter, read_arrays, write_arrays
+
+# Columns of the `documents` array: string ids of the document id, table and narrative.
+DOC_ID, DOC_TABLE, DOC_CONTEXT = 0, 1, 2
+# Columns of the `rows` array, indexed by FAISS id.
+ROW_DOC, ROW_NUMBER, ROW_TEXT = 0, 1, 2
+
+
+class MetadataStore:
+    """
+    Memory-mapped chunk metadata, indexed by integer FAISS id.
+
+    Each document's table and narrative are stored once; a row only holds the
+    index of its parent document, its row number and its own table row text.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta, arrays = read_arrays(self.path)
+        self.strings = StringTable(arrays["blob"], arrays["string_offsets"])
+        self.documents = arrays["documents"]
+        self.rows = arrays["rows"]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, idx: int) -> bool:
+        return 0 <= idx < len(self.rows) and self.rows[idx, ROW_DOC] >= 0
+
+    def valid(self, ids: np.ndarray) -> np.ndarray:
+        """Boolean mask of the FAISS ids that refer to a live row."""
+        mask = (ids >= 0) & (ids < len(self.rows))
+        mask[mask] = self.rows[ids[mask], ROW_DOC] >= 0
+        return mask
+
+    def __getitem__(self, idx: int) -> Dict[str, str | int]:
+        doc_index, row_number, row_text = self.rows[idx]
+        document = self.documents[doc_index]
+        doc_id = self.strings[document[DOC_ID]]
+        return {
+            "id": f"{doc_id}::row_{row_number}",
+            "doc_id": doc_id,
+            "row": int(row_number),
+            "table_row": self.strings[row_text],
+            "table_markdown": self.strings[document[DOC_TABLE]],
+            "context": self.strings[document[DOC_CONTEXT]],
+        }
+
+
+class MetadataStoreWriter:
+    """
+    Collects documents and rows during an index build and writes a MetadataStore file.
+    Ids without a row (deleted chunks) are written as holes.
+    """
+    def __init__(self):
+        self.strings = StringTableWriter()
+        self.documents = array("q")
+        self.row_ids = array("q")
+        self.rows = array("q")
+
+    def add_document(self, doc_id: str, table_markdown: str, context: str) -> int:
+        self.documents.extend((
+            self.strings.add(doc_id),
+            self.strings.add(table_markdown),
+            self.strings.add(context),
+        ))
+        return len(self.documents) // 3 - 1
+
+    def add_row(self, faiss_id: int, doc_index: int, row_number: int, table_row: str) -> None:
+        self.row_ids.append(faiss_id)
+        self.rows.extend((doc_index, row_number, self.strings.add(table_row)))
+
+    def write(self, path: Path, size: int = None, build_id: str = None) -> None:
+        """
+        Writes the store; `size` is one past the largest FAISS id ever assigned.
+        The side indexes built from it carry the same `build_id`.
+        """
+        row_ids = np.frombuffer(self.row_ids, dtype=np.int64)
+        size = max(size or 0, int(row_ids.max()) + 1 if len(row_ids) else 0)
+        rows = np.full((size, 3), -1, dtype=np.int64)
+        rows[row_ids] = np.frombuffer(self.rows, dtype=np.int64).reshape(-1, 3)
+
+        blob, offsets = self.strings.to_arrays()
+        write_arrays(path, {
+            "blob": blob,
+            "string_offsets": offsets,
+            "documents": np.frombuffer(self.documents, dtype=np.int64).reshape(-1, 3),
+            "rows": rows,
+        }, meta={"format": "metadata", "version": 1, "build_id": build_id})
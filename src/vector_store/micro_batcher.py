@@ -0,0 +1,131 @@
+# src/vector_store/micro_batcher.py
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import config
+from src.common import tracing
+from .registry import get_retriever
+
+
+class _Request:
+    __slots__ = ("queries", "k", "filters", "done", "retriever", "indices", "allowed", "cache_hits", "error")
+
+    def __init__(self, queries: List[str], k: int, filters: dict | None):
+        self.queries, self.k, self.filters = queries, k, filters
+        self.done = threading.Event()
+        self.retriever = self.indices = self.allowed = self.error = None
+        self.cache_hits = 0
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent retrievals into shared embedding and FAISS calls.
+
+    Callers block in batch_similarity_search while one worker thread gathers every
+    request that arrives within `window_seconds` (up to `max_queries` queries),
+    embeds all their queries in one batch and runs one FAISS search per distinct
+    (k, filters). Each caller then fuses and builds its own Documents, so results
+    are the same as VectorRetriever.batch_similarity_search. Embedding-cache hits
+    are counted per request and charged to the caller's step, as without batching.
+    """
+    def __init__(self, window_seconds: float, max_queries: int):
+        self.window_seconds = window_seconds
+        self.max_queries = max_queries
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "requests": 0, "queries": 0, "searches": 0, "max_batch_queries": 0}
+        threading.Thread(target=self._loop, name="retrieval-batcher", daemon=True).start()
+
+    def batch_similarity_search(self, queries: List[str], k: int = 5,
+                                filters: dict[str, list[str]] = None) -> List[Document]:
+        if not queries:
+            return []
+        request = _Request(queries, k, filters)
+        self._queue.put(request)
+        request.done.wait()
+        tracing.count("cache_hits", request.cache_hits)
+        if request.error is not None:
+            raise request.error
+        return request.retriever.rank_hits(queries, request.indices, k, request.allowed)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["mean_batch_queries"] = stats["queries"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0].queries)
+            deadline = time.monotonic() + self.window_seconds
+            while size < self.max_queries:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                size += len(batch[-1].queries)
+            self._run(batch)
+
+    def _run(self, batch: List[_Request]) -> None:
+        groups: Dict[tuple, List[tuple[_Request, int]]] = {}
+        offset = 0
+        for request in batch:
+            key = (request.k, json.dumps(request.filters or {}, sort_keys=True))
+            groups.setdefault(key, []).append((request, offset))
+            offset += len(request.queries)
+
+        try:
+            retriever = get_retriever()
+            embeddings, hits = retriever.embedding_model.embed_queries_with_hits([q for r in batch for q in r.queries])
+            for request, start in ((r, o) for members in groups.values() for r, o in members):
+                request_hits = hits[start:start + len(request.queries)]
+                request.cache_hits = len({q.strip() for q, hit in zip(request.queries, request_hits) if hit})
+            for (k, _), members in groups.items():
+                allowed = retriever.filter_ids(members[0][0].filters)
+                rows = np.concatenate([np.arange(o, o + len(r.queries)) for r, o in members])
+                indices = retriever.dense_search(embeddings[rows], k, allowed)
+                start = 0
+                for request, _ in members:
+                    request.retriever, request.allowed = retriever, allowed
+                    request.indices = indices[start:start + len(request.queries)]
+                    start += len(request.queries)
+        except Exception as e:
+            for request in batch:
+                if request.indices is None:
+                    request.error = e
+        finally:
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["requests"] += len(batch)
+                self._stats["queries"] += offset
+                self._stats["searches"] += len(groups)
+                self._stats["max_batch_queries"] = max(self._stats["max_batch_queries"], offset)
+            for request in batch:
+                request.done.set()
+
+
+_batcher: MicroBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> MicroBatcher | None:
+    """The shared batcher, or None when `config.retrieval_batch_window_ms` is 0 (no batching)."""
+    global _batcher
+    if config.retrieval_batch_window_ms <= 0:
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(config.retrieval_batch_window_ms / 1000, config.retrieval_batch_max_queries)
+    return _batcher
@@ -0,0 +1,94 @@
+# src/vector_store/registry.py
+
+import threading
+import time
+from pathlib import Path
+
+from src.config import config
+from .build_record import IncompleteBuildError
+from .retriever import VectorRetriever
+
+# A first load that finds a build half-published waits this long for it to finish.
+PUBLISH_RETRIES = 30
+PUBLISH_RETRY_DELAY = 1.0
+
+_lock = threading.Lock()
+# (index path, model name) -> (build signature at load time, retriever)
+_retrievers: dict[tuple[str, str], tuple[tuple, VectorRetriever]] = {}
+
+
+def _file_signature(*paths: Path) -> tuple:
+    """mtime/size of each file; changes whenever the builder replaces it."""
+    signature = []
+    for path in paths:
+        stat = path.stat()
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _build_signature(index_path: Path, metadata_path: Path) -> tuple:
+    """
+    Signature of the published build record, which the builder writes after every
+    other file (and rewrites when it restores missing side indexes). Without one,
+    falls back to every file the retriever loads.
+    """
+    if config.build_record_path.exists():
+        return _file_signature(config.build_record_path)
+    side_paths = (config.bm25_index_path, config.facet_index_path, config.table_store_path)
+    return _file_signature(index_path, metadata_path, *(path for path in side_paths if path.exists()))
+
+
+def _load(index_path: Path, metadata_path: Path, model_name: str, current: VectorRetriever | None) -> VectorRetriever:
+    """Loads the published build; while one is half-published, keeps `current` or waits for it."""
+    for attempt in range(PUBLISH_RETRIES):
+        try:
+            return VectorRetriever(index_path, metadata_path, model_name)
+        except IncompleteBuildError as e:
+            if current is not None:
+                print(f"[INFO] {e} Keeping the loaded index.")
+                return current
+            if attempt == PUBLISH_RETRIES - 1:
+                raise
+            print(f"[INFO] {e} Retrying in {PUBLISH_RETRY_DELAY:g}s...")
+            time.sleep(PUBLISH_RETRY_DELAY)
+
+
+def get_retriever(index_path: Path = None, metadata_path: Path = None, model_name: str = None) -> VectorRetriever:
+    """
+    Returns the shared VectorRetriever for an index/model pair.
+
+    The index and its side files are loaded once per process on first use and
+    reloaded transparently when a build is published. Safe to call from any thread.
+    """
+    index_path = Path(index_path or config.faiss_index_path)
+    metadata_path = Path(metadata_path or config.metadata_path)
+    model_name = model_name or config.embedding_model_name
+    key = (str(index_path.resolve()), model_name)
+    signature = _build_signature(index_path, metadata_path)
+
+    entry = _retrievers.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    with _lock:
+        entry = _retrievers.get(key)
+        if entry is None or entry[0] != signature:
+            action = "Loading" if entry is None else "Reloading"
+            print(f"[INFO] {action} vector index from {index_path}...")
+            retriever = _load(index_path, metadata_path, model_name, entry[1] if entry else None)
+            entry = (signature, retriever)
+            _retrievers[key] = entry
+        return entry[1]
+
+
+def index_version(index_path: Path = None, metadata_path: Path = None) -> tuple:
+    """Identifies the index build currently published; changes on every rebuild."""
+    index_path = Path(index_path or config.faiss_index_path)
+    metadata_path = Path(metadata_path or config.metadata_path)
+    return _build_signature(index_path, metadata_path)
+
+
+def clear_retrievers() -> None:
+    """Drops every cached retriever; the next call to get_retriever reloads from disk."""
+    with _lock:
+        _retrievers.clear()
@@ -1,36 +1,221 @@
 # src/vector_store/retriever.py
 
 import faiss
-import pickle
 import numpy as np
 from pathlib import Path
 from langchain_core.documents import Document
 
 from src.config import config
-from .embedding_model import embedding_model
+from .embedding_model import get_embedding_model
+from .metadata_store import MetadataStore
+from .manifest import ChunkManifest
+from .build_record import IncompleteBuildError, index_matches, read_build_record
+from .index_factory import filtered_search_params, set_search_params
+from .bm25_index import BM25Index
+from .facet_index import FacetIndex
+from .table_store import TableStore
+
+# Markdown header and separator lines, kept in every grouped table.
+TABLE_HEADER_ROWS = 2
 
 
 class VectorRetriever:
-    def __init__(self):
-        self.index = faiss.read_index(str(config.faiss_index_path))
-        self.metadata = self._load_metadata(config.metadata_path)
+    def __init__(self, index_path: Path = None, metadata_path: Path = None, model_name: str = None,
+                 bm25_path: Path = None, facet_path: Path = None, table_path: Path = None,
+                 manifest_path: Path = None, build_record_path: Path = None):
+        self.index_path = Path(index_path or config.faiss_index_path)
+        self.metadata_path = Path(metadata_path or config.metadata_path)
+        self.bm25_path = Path(bm25_path or config.bm25_index_path)
+        self.facet_path = Path(facet_path or config.facet_index_path)
+        self.table_path = Path(table_path or config.table_store_path)
+        self.manifest_path = Path(manifest_path or config.manifest_path)
+        self.build_record_path = Path(build_record_path or config.build_record_path)
+        self._check_embedding_model(model_name or config.embedding_model_name)
+        self.embedding_model = get_embedding_model(model_name)
+
+        # The record first: files replaced after it was read fail the check below.
+        record = read_build_record(self.build_record_path)
+        index_stats = [self.index_path.stat()]
+        self.index = set_search_params(self._load_index(self.index_path))
+        index_stats.append(self.index_path.stat())
+        self.metadata = self._load_metadata(self.metadata_path)
+        self.bm25 = self._load_bm25(self.bm25_path)
+        self.facets = self._load_facets(self.facet_path)
+        self.tables = self._load_tables(self.table_path)
+        self.build_id = record["build_id"] if record else None
+        if record is not None:
+            self._check_build(record, index_stats)
 
-    def _load_metadata(self, metadata_path: Path) -> list[dict]:
-        with open(metadata_path, "rb") as f:
-            return pickle.load(f)
+    def _check_embedding_model(self, model_name: str) -> None:
+        """Refuses an index whose build manifest records a different embedding model than `model_name`."""
+        manifest = ChunkManifest.load(self.manifest_path)
+        if manifest is None:
+            print(f"[INFO] No build manifest at {self.manifest_path}; cannot check the index's embedding model.")
+            return
+        built_with = manifest.embedding_model
+        manifest.close()
+        if built_with != model_name:
+            raise ValueError(
+                f"{self.index_path} was built with embedding model '{built_with}', not '{model_name}'; "
+                f"rebuild it or point the index paths at an index built with '{model_name}'."
+            )
 
-    def similarity_search(self, query: str, k: int = 5) -> list[Document]:
+    def _check_build(self, record: dict, index_stats: list) -> None:
+        """Raises IncompleteBuildError unless every file loaded belongs to the build `record` names."""
+        stale = [] if all(index_matches(record, stat) for stat in index_stats) else [self.index_path]
+        for store in (self.metadata, self.bm25, self.facets, self.tables):
+            if store is not None and store.meta.get("build_id") != record["build_id"]:
+                stale.append(store.path)
+        if stale:
+            raise IncompleteBuildError(
+                f"{', '.join(map(str, stale))} not from build {record['build_id']}; a build is being published."
+            )
+
+    def _load_index(self, index_path: Path) -> faiss.Index:
+        """
+        Memory-maps the index where the FAISS build supports it, so every reader
+        shares the page cache instead of holding a private copy of the vectors.
         """
-        Perform FAISS similarity search using the embedding model.
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            return faiss.read_index(str(index_path), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            return faiss.read_index(str(index_path))
+
+    def _load_metadata(self, metadata_path: Path) -> MetadataStore:
+        return MetadataStore(metadata_path)
+
+    def _load_bm25(self, bm25_path: Path) -> BM25Index | None:
+        if not bm25_path.exists():
+            print(f"[INFO] No BM25 index at {bm25_path}; using dense retrieval only.")
+            return None
+        try:
+            return BM25Index(bm25_path, k1=config.bm25_k1, b=config.bm25_b)
+        except ValueError as e:
+            print(f"[INFO] {e} Using dense retrieval only.")
+            return None
+
+    def _load_facets(self, facet_path: Path) -> FacetIndex | None:
+        if not facet_path.exists():
+            print(f"[INFO] No facet index at {facet_path}; searches are unfiltered.")
+            return None
+        return FacetIndex(facet_path)
+
+    def _load_tables(self, table_path: Path) -> TableStore | None:
+        if not table_path.exists():
+            print(f"[INFO] No parsed table store at {table_path}; tables are parsed from text.")
+            return None
+        return TableStore(table_path)
+
+    def filter_ids(self, filters: dict[str, list[str]] = None) -> np.ndarray | None:
+        """
+        FAISS ids matching `filters` (e.g. {"year": ["2008"]}), or None for an
+        unrestricted search: no filters, no facet index, or no matching row.
+        """
+        if not filters or self.facets is None:
+            return None
+        ids = self.facets.matching_ids(filters)
+        return ids if len(ids) else None
+
+    def similarity_search(self, query: str, k: int = 5, filters: dict[str, list[str]] = None) -> list[Document]:
+        """
+        Perform FAISS similarity search using the embedding model
+        (fused with BM25 when hybrid retrieval is enabled).
+        """
+        return self.batch_similarity_search([query], k, filters)[:k]
+
+    def batch_similarity_search(self, queries: list[str], k: int = 5,
+                                filters: dict[str, list[str]] = None) -> list[Document]:
+        """
+        Embed all queries in one batch and run a single FAISS search over the matrix.
+
+        `filters` restricts the search to rows with matching facets before it runs
+        (see filter_ids); if no row matches, the search is unrestricted.
+
+        Hits are deduplicated by chunk id and ordered rank-first: every query's best
+        hit comes before any query's second-best hit. With hybrid retrieval, dense and
+        BM25 rankings are merged by reciprocal rank fusion instead.
+        """
+        if not queries:
+            return []
+        allowed = self.filter_ids(filters)
+        indices = self.dense_search(self.embedding_model.embed_queries(queries), k, allowed)
+        return self.rank_hits(queries, indices, k, allowed)
+
+    def dense_search(self, embeddings: np.ndarray, k: int, allowed: np.ndarray = None) -> np.ndarray:
+        """FAISS top-k ids per embedded query, restricted to `allowed` ids when given."""
+        params = filtered_search_params(self.index, allowed) if allowed is not None else None
+        _, indices = self.index.search(embeddings, k, params=params)
+        return indices
+
+    def rank_hits(self, queries: list[str], indices: np.ndarray, k: int, allowed: np.ndarray = None) -> list[Document]:
+        """Turns dense_search results for `queries` into the Documents batch_similarity_search returns."""
+        if self.bm25 is not None and config.use_hybrid_retrieval:
+            return [self._to_document(idx) for idx in self._fuse(queries, indices, k, allowed)]
+
+        flat = indices.T.ravel()
+        flat = flat[self.metadata.valid(flat)]
+        _, first_seen = np.unique(flat, return_index=True)
+        unique_ids = flat[np.sort(first_seen)]
+
+        return [self._to_document(idx) for idx in unique_ids]
+
+    def _fuse(self, queries: list[str], dense: np.ndarray, k: int, allowed: np.ndarray = None) -> list[int]:
+        """
+        Scores each chunk by sum(1 / (rrf_k + rank)) over every query's dense and
+        BM25 top-k, and keeps at most as many chunks as dense search alone returns.
+        """
+        rankings = list(dense) + [self.bm25.search(query, k, allowed)[1] for query in queries]
+        scores: dict[int, float] = {}
+        for ranking in rankings:
+            ranking = ranking[self.metadata.valid(ranking)]
+            for rank, idx in enumerate(ranking.tolist(), start=1):
+                scores[idx] = scores.get(idx, 0.0) + 1.0 / (config.rrf_k + rank)
+        return sorted(scores, key=scores.get, reverse=True)[:k * len(queries)]
+
+    def group_by_document(self, docs: list[Document]) -> list[Document]:
+        """
+        Merges row hits into one Document per filing, ordered by each filing's first hit.
+
+        The table holds the header rows plus the hit rows in table order (or the whole
+        table with context_table_rows="full") and the narrative appears once, both read
+        from the metadata store. metadata: id (filing id), rows (hit row numbers), table,
+        table_rows (row number of each table line), header_rows, narrative.
         """
-        embedding = embedding_model.embed_query(query)
-        scores, indices = self.index.search(np.array([embedding], dtype=np.float32), k)
+        groups: dict[str, tuple[int, set[int]]] = {}
+        for doc in docs:
+            faiss_id, rows = groups.setdefault(doc.metadata["doc_id"], (doc.metadata["faiss_id"], set()))
+            rows.add(doc.metadata["row"])
+        return [self._to_group_document(doc_id, faiss_id, rows) for doc_id, (faiss_id, rows) in groups.items()]
 
-        results = []
-        for idx in indices[0]:
-            if 0 <= idx < len(self.metadata):
-                meta = self.metadata[idx]
-                content = f"passage: {meta.get('table_markdown', '')}\n\n{meta.get('context', '')}"
-                results.append(Document(page_content=content.strip(), metadata={"id": meta.get("id", "")}))
+    def _to_group_document(self, doc_id: str, faiss_id: int, rows: set[int]) -> Document:
+        meta = self.metadata[faiss_id]
+        table_rows = meta["table_markdown"].split("\n")  # the builder's row numbering
+        if config.context_table_rows == "matched":
+            keep = sorted(rows | set(range(min(TABLE_HEADER_ROWS, len(table_rows)))))
+        else:
+            keep = range(len(table_rows))
+        keep = [i for i in keep if i < len(table_rows)]
+        table = "\n".join(table_rows[i].strip() for i in keep)
+        narrative = meta["context"]
+        return Document(
+            page_content=f"passage: {table}\n\n{narrative}".strip(),
+            metadata={
+                "id": doc_id,
+                "rows": sorted(rows),
+                "table": table,
+                "table_rows": keep,
+                "header_rows": min(TABLE_HEADER_ROWS, len(keep)),
+                "narrative": narrative,
+            },
+        )
 
-        return results
+    def _to_document(self, idx: int) -> Document:
+        meta = self.metadata[idx]
+        content = f"passage: {meta.get('table_markdown', '')}\n\n{meta.get('context', '')}"
+        return Document(page_content=content.strip(), metadata={
+            "id": meta["id"],
+            "doc_id": meta["doc_id"],
+            "row": meta["row"],
+            "faiss_id": int(idx),
+        })
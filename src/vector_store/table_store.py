@@ -0,0 +1,89 @@
+# src/vector_store/table_store.py
+
+from array import array
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from src.common.tables import ParsedTable, find_cell, parse_markdown_table
+from src.vector_store.array_store import StringTable, StringTableWriter, read_arrays, write_arrays
+from src.vector_store.metadata_store import MetadataStore, DOC_ID, DOC_TABLE
+
+# Columns of the `documents` array.
+T_DOC_ID, T_COL_START, T_COLS, T_ROW_START, T_ROWS, T_VALUE_START = range(6)
+
+
+class TableStore:
+    """
+    Memory-mapped numeric tables, parsed once at build time.
+
+    Each document's values and units are one contiguous (rows, columns) block, so
+    fetching a table is a slice plus its label strings; nothing is re-parsed.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta, arrays = read_arrays(self.path)
+        self.strings = StringTable(arrays["blob"], arrays["string_offsets"])
+        self.documents = arrays["documents"]
+        self.columns = arrays["columns"]
+        self.years = arrays["years"]
+        self.row_labels = arrays["row_labels"]
+        self.values = arrays["values"]
+        self.units = arrays["units"]
+        self._doc_index: Dict[str, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get_table(self, doc_id: str) -> ParsedTable | None:
+        if self._doc_index is None:
+            self._doc_index = {self.strings[s]: i for i, s in enumerate(self.documents[:, T_DOC_ID])}
+        i = self._doc_index.get(doc_id)
+        if i is None:
+            return None
+        _, col_start, n_cols, row_start, n_rows, value_start = self.documents[i]
+        values = slice(value_start, value_start + n_rows * n_cols)
+        return ParsedTable(
+            doc_id=doc_id,
+            columns=[self.strings[s] for s in self.columns[col_start:col_start + n_cols]],
+            years=self.years[col_start:col_start + n_cols],
+            row_labels=[self.strings[s] for s in self.row_labels[row_start:row_start + n_rows]],
+            values=self.values[values].reshape(n_rows, n_cols),
+            units=self.units[values].reshape(n_rows, n_cols),
+        )
+
+    def get_cell(self, doc_id: str, row_label: str, column: str) -> float | None:
+        """Value at (row_label, column) in the filing's table; labels match as in find_cell."""
+        table = self.get_table(doc_id)
+        return find_cell([table], row_label, column) if table is not None else None
+
+
+def build_table_store(metadata: MetadataStore, path: Path) -> None:
+    """Parses the table of every document in `metadata` once and writes a TableStore."""
+    strings = StringTableWriter()
+    documents, columns, row_labels = array("q"), array("q"), array("q")
+    years, values, units = array("i"), array("d"), array("b")
+
+    for document in metadata.documents:
+        doc_id = metadata.strings[document[DOC_ID]]
+        table = parse_markdown_table(metadata.strings[document[DOC_TABLE]], doc_id)
+        n_rows, n_cols = table.values.shape
+        documents.extend((strings.add(doc_id), len(columns), n_cols, len(row_labels), n_rows, len(values)))
+        columns.extend(strings.add(c) for c in table.columns)
+        years.extend(table.years.tolist())
+        row_labels.extend(strings.add(r) for r in table.row_labels)
+        values.extend(table.values.ravel().tolist())
+        units.extend(table.units.ravel().tolist())
+
+    blob, offsets = strings.to_arrays()
+    write_arrays(path, {
+        "blob": blob,
+        "string_offsets": offsets,
+        "documents": np.frombuffer(documents, dtype=np.int64).reshape(-1, 6),
+        "columns": np.frombuffer(columns, dtype=np.int64),
+        "years": np.frombuffer(years, dtype=np.int32),
+        "row_labels": np.frombuffer(row_labels, dtype=np.int64),
+        "values": np.frombuffer(values, dtype=np.float64),
+        "units": np.frombuffer(units, dtype=np.int8),
+    }, meta={"format": "tables", "version": 1, "build_id": metadata.meta.get("build_id")})
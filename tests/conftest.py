@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+
+# Importing src.agent builds the API clients, which need a key even when unused.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("COHERE_API_KEY", "test")
@@ -0,0 +1,74 @@
+# tests/test_incremental_build.py
+
+import hashlib
+
+import faiss
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.vector_store.builder as builder
+from src.config import config
+from src.vector_store.builder import IndexBuilder
+
+DIM = 16
+
+
+class FakeEmbeddingModel:
+    """Deterministic vectors from a hash of the text, so the tests need no model download."""
+    class model:
+        @staticmethod
+        def get_sentence_embedding_dimension() -> int:
+            return DIM
+
+    def encode_documents(self, texts):
+        seeds = [int.from_bytes(hashlib.sha1(t.encode("utf-8")).digest()[:4], "little") for t in texts]
+        return np.stack([np.random.default_rng(s).standard_normal(DIM) for s in seeds]).astype(np.float32)
+
+    def start_pool(self, *args):
+        pass
+
+    def stop_pool(self):
+        pass
+
+
+def _table(n_rows: int, seed: int) -> str:
+    return "\n".join(["| item | 2008 |", "| --- | --- |"] + [f"| item {seed}-{i} | {seed * 10 + i} |" for i in range(n_rows)])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder, "get_embedding_model", FakeEmbeddingModel)
+    for field in ("faiss_index_path", "metadata_path", "manifest_path", "bm25_index_path",
+                  "facet_index_path", "table_store_path", "build_record_path"):
+        monkeypatch.setattr(config, field, tmp_path / getattr(config, field).name)
+    monkeypatch.setattr(config, "data_path", tmp_path / "data.csv")
+    monkeypatch.setattr(config, "embedding_workers", 1)
+    return tmp_path
+
+
+def _write_csv(rows):
+    pd.DataFrame(rows, columns=["id", "question", "answer", "table_markdown", "context"]).to_csv(config.data_path, index=False)
+
+
+def _live_rows(rows) -> int:
+    return sum(len(table.split("\n")) for _, _, _, table, _ in rows)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat"])
+def test_incremental_update_edits_and_deletes_rows(store, monkeypatch, capsys, index_type):
+    monkeypatch.setattr(config, "index_type", index_type)
+    rows = [(f"doc_{i}", "q", "1", _table(3, i), f"narrative {i}") for i in range(6)]
+    rows.append(("doc_0", "q", "1", _table(2, 99), "repeated document id"))
+    _write_csv(rows)
+    IndexBuilder().run()
+
+    rows[1] = ("doc_1", "q", "1", _table(3, 1), "edited narrative")
+    del rows[2]
+    _write_csv(rows)
+    IndexBuilder().run(incremental=True)
+    assert faiss.read_index(str(config.faiss_index_path)).ntotal == _live_rows(rows)
+
+    capsys.readouterr()
+    IndexBuilder().run(incremental=True)
+    assert "Index is up to date." in capsys.readouterr().out
@@ -0,0 +1,16 @@
+# tests/test_program.py
+
+from src.agent.program import evaluate_program, format_result
+
+
+def test_multiply_by_const_100_is_percent():
+    result = evaluate_program("divide(5, 20), multiply(#0, const_100)", [])
+    assert result.is_percent
+    assert format_result(result) == "25.0%"
+
+
+def test_multiply_by_larger_constants_is_not_percent():
+    for constant, expected in (("const_1000", "5000"), ("const_1000000", "5000000")):
+        result = evaluate_program(f"multiply(5, {constant})", [])
+        assert not result.is_percent
+        assert format_result(result) == expected
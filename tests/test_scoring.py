@@ -0,0 +1,62 @@
+# tests/test_scoring.py
+
+import numpy as np
+import pytest
+
+from src.evaluation.metrics import (
+    compute_accuracies, compute_accuracy, compute_precision, compute_precision_recall_at_k, compute_recall,
+)
+
+ANSWER_PAIRS = [
+    ("25%", "0.25"),
+    ("25.0%", "25%"),
+    ("(12.5)", "-12.5"),
+    ("(12.5", "-12.5"),
+    ("-(3)", "-3"),
+    ("$1,234.5", "1234.5"),
+    ("$ 1.2 million", "1200000"),
+    ("3 billion", "3000000000"),
+    ("1e3", "1000"),
+    ("1000", "1e3"),
+    ("19.7%", "20%"),
+    ("yes", "Yes"),
+    ("no", "yes"),
+    ("", "5"),
+    ("5", ""),
+    ("", ""),
+    ("about 5", "5"),
+    ("5 and 6", "5"),
+    ("0", "0"),
+    ("0", "0.001"),
+]
+
+
+@pytest.mark.parametrize("predicted, expected", ANSWER_PAIRS)
+def test_compute_accuracies_matches_compute_accuracy(predicted, expected):
+    vectorized = compute_accuracies([predicted], [expected])
+    assert vectorized[0] == pytest.approx(compute_accuracy("", predicted, expected))
+
+
+def test_compute_accuracies_over_a_column():
+    predicted, expected = zip(*ANSWER_PAIRS)
+    scalar = [compute_accuracy("", p, e) for p, e in ANSWER_PAIRS]
+    np.testing.assert_allclose(compute_accuracies(list(predicted), list(expected)), scalar)
+
+
+RETRIEVALS = [
+    (["doc_a::row_0", "doc_b::row_2", "doc_c"], "doc_b"),
+    (["doc_a::row_0", "doc_a::row_1"], "doc_a"),
+    (["doc_a"], "doc_b"),
+    ([], "doc_a"),
+]
+
+
+@pytest.mark.parametrize("k", [None, 1, 2])
+def test_hits_at_k_matches_scalar_precision_and_recall(k):
+    joined = [",".join(ids) for ids, _ in RETRIEVALS]
+    expected = [expected_id for _, expected_id in RETRIEVALS]
+    precision, recall = compute_precision_recall_at_k(joined, expected, k)
+    for i, (ids, expected_id) in enumerate(RETRIEVALS):
+        ids = ids[:k]
+        assert precision[i] == pytest.approx(compute_precision(ids, expected_id))
+        assert recall[i] == pytest.approx(compute_recall(ids, expected_id))